@@ -0,0 +1,180 @@
+"""
+Benchmarks reading, writing, text conversion and classification on synthetic maps.
+
+Timings are the best of `--repeat` runs, peak memory is measured in a separate run under tracemalloc (numpy
+allocations included). Results are saved as JSON so a later run can be compared against them:
+
+```bash
+python benchmarks/bench.py -o benchmarks/baseline.json
+# ...change things...
+python benchmarks/bench.py --compare benchmarks/baseline.json
+```
+
+`--compare` exits with 1 if any case got slower (or used more memory) than the baseline by more than `--tolerance`.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from synthetic import write_map
+from pysspm_rhythia.pysspm import SSPMParser
+from pysspm_rhythia.extras import NoteClassifier
+
+
+def _read(path):
+    return lambda: SSPMParser().ReadSSPM(path)
+
+def _read_columnar(path):
+    return lambda: SSPMParser().ReadSSPM(path, columnar=True)
+
+class _Discard:
+    # file object that throws the data away, so writing is timed without the disk
+    def write(self, data) -> int:
+        return len(data)
+
+def _write(path):
+    parser = SSPMParser().ReadSSPM(path, columnar=True)
+    return lambda: parser.WriteSSPM(_Discard(), audio_bytes=parser.audio_bytes, cover_bytes=parser.cover_bytes, map_name="Benchmark output", song_name="Benchmark", mappers=["Benchmark"])
+
+def _notes2text(path):
+    parser = SSPMParser().ReadSSPM(path, columnar=True)
+    return lambda: parser.NOTES2TEXT()
+
+def _classify(path):
+    notes = SSPMParser().ReadSSPM(path, columnar=True).Notes
+    return lambda: NoteClassifier(notes).detect_sequences()
+
+
+# name: (makes the function to time from a map path, runs on V1 maps too). Anything but reading is the same code for V1 and V2
+OPERATIONS = {
+    "read": (_read, True),
+    "read_columnar": (_read_columnar, True),
+    "write": (_write, False),
+    "notes2text": (_notes2text, False),
+    "classify": (_classify, False),
+}
+
+
+def _best_time(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(function) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(operation: str, path: str, note_count: int, repeat: int = 3) -> dict:
+    """
+    Times one operation on one map. Setup (reading the map for write/notes2text/classify) is not timed
+    """
+    function = OPERATIONS[operation][0](path)
+    seconds = _best_time(function, repeat)
+    peak = _peak_memory(function) # setup done already so only the operation itself is counted
+    size = os.path.getsize(path)
+
+    return {
+        "seconds": seconds,
+        "notes_per_s": note_count / seconds if seconds else None,
+        "mb_per_s": size / 1e6 / seconds if seconds else None,
+        "peak_mb": peak / 1e6,
+        "file_mb": size / 1e6,
+    }
+
+
+def run(sizes: list, quantum_ratios: list, versions: list, audio_size: int, operations: list, repeat: int, workdir: str) -> dict:
+    results = {}
+    for version in versions:
+        for quantum_ratio in quantum_ratios:
+            for note_count in sizes:
+                path = os.path.join(workdir, f"synthetic_v{version}_{note_count}_q{quantum_ratio}_a{audio_size}.sspm")
+                if not os.path.exists(path): # maps are deterministic so they can be reused between runs
+                    write_map(path, note_count, quantum_ratio, audio_size, version)
+
+                for operation in operations:
+                    if version == 1 and not OPERATIONS[operation][1]:
+                        continue
+                    case = f"{operation}/v{version}/{note_count}/q{quantum_ratio}/a{audio_size}"
+                    results[case] = run_case(operation, path, note_count, repeat)
+                    print(f"{case:<45} {results[case]['seconds']:>9.4f}s {results[case]['notes_per_s']:>14,.0f} notes/s {results[case]['mb_per_s']:>9.1f} MB/s {results[case]['peak_mb']:>9.1f} MB peak", flush=True)
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns (case, metric, baseline value, current value) for every case slower or using more memory than the baseline by more than `tolerance`
+    """
+    regressions = []
+    for case, result in current["results"].items():
+        before = baseline["results"].get(case)
+        if before is None:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if result[metric] > before[metric] * (1 + tolerance) and result[metric] - before[metric] > 1e-3: # ignores noise on tiny cases
+                regressions.append((case, metric, before[metric], result[metric]))
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pysspm-rhythia on synthetic maps")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000, 5000000], help="note counts")
+    parser.add_argument("--quantum", type=float, nargs="+", default=[0.0, 0.25], help="fractions of quantum notes")
+    parser.add_argument("--versions", type=int, nargs="+", default=[2, 1], choices=[1, 2])
+    parser.add_argument("--audio-mb", type=float, default=4, help="size of the random audio in each map")
+    parser.add_argument("--operations", nargs="+", default=list(OPERATIONS), choices=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=None, help="where to keep the generated maps (a temporary folder by default)")
+    parser.add_argument("-o", "--output", default=None, help="save the results as JSON (a baseline)")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/memory growth before it counts as a regression")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temporary:
+        workdir = args.workdir or temporary
+        os.makedirs(workdir, exist_ok=True)
+        current = run(args.sizes, args.quantum, args.versions, int(args.audio_mb * 1024 * 1024), args.operations, args.repeat, workdir)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for case, metric, before, after in regressions:
+            print(f"REGRESSION {case} {metric}: {before:.4f} -> {after:.4f}")
+        if regressions:
+            return 1
+        print("No regressions")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
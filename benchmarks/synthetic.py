@@ -0,0 +1,77 @@
+"""
+Generates synthetic .sspm maps for benchmarking. Maps are seeded so the same arguments always give the same bytes.
+
+```python
+from synthetic import synthetic_notes, write_map
+
+write_map("big.sspm", 1_000_000, quantum_ratio=0.25, audio_size=4 * 1024 * 1024, version=2)
+```
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pysspm_rhythia.pysspm import SSPMParser, NoteArray
+
+
+def synthetic_notes(note_count: int, quantum_ratio: float = 0.0, seed: int = 0) -> NoteArray:
+    """
+    Random notes in time order. Gaps are mostly 50-300ms with some chords (0ms), grid notes are on the 3x3 grid
+    and `quantum_ratio` of the notes are quantum (never within 0.05 of a grid position, so they are always written as quantum).
+    """
+    rng = np.random.default_rng(seed)
+
+    gaps = rng.choice([0, 50, 75, 100, 150, 200, 300], size=note_count, p=[0.1, 0.1, 0.15, 0.25, 0.2, 0.1, 0.1])
+    ms = (1000 + np.cumsum(gaps)).astype(np.uint32)
+    x = rng.integers(0, 3, size=note_count).astype(np.float32)
+    y = rng.integers(0, 3, size=note_count).astype(np.float32)
+
+    quantum = rng.random(note_count) < quantum_ratio
+    count = int(quantum.sum())
+    x[quantum] = rng.integers(0, 2, size=count) + rng.uniform(0.05, 0.95, size=count)
+    y[quantum] = rng.integers(0, 2, size=count) + rng.uniform(0.05, 0.95, size=count)
+
+    return NoteArray(x, y, ms, quantum)
+
+
+def _v1_markers(notes: NoteArray) -> bytes:
+    # V1 records are the V2 ones without the marker type byte (5th byte of every record)
+    markers, _ = SSPMParser()._EncodeMarkers(notes)
+    sizes = np.where(notes.quantum, 14, 8)
+    starts = np.cumsum(sizes) - sizes
+    return np.delete(np.frombuffer(markers, dtype=np.uint8), starts + 4).tobytes()
+
+
+def write_map(filename: str, note_count: int, quantum_ratio: float = 0.0, audio_size: int = 0, version: int = 2, seed: int = 0) -> str:
+    """
+    Writes a synthetic map with `note_count` notes and `audio_size` bytes of random audio (no audio when 0).
+
+    Returns:
+        str: _filename_
+    """
+    notes = synthetic_notes(note_count, quantum_ratio, seed)
+    audio = np.random.default_rng(seed + 1).bytes(audio_size) if audio_size else None
+    map_name = f"Synthetic {note_count} notes"
+
+    if version == 2:
+        SSPMParser().WriteSSPM(filename, audio_bytes=audio, cover_bytes=None, map_name=map_name, mappers=["Benchmark"], Notes=notes)
+        return filename
+    if version != 1:
+        raise ValueError("version has to be 1 or 2")
+
+    with open(filename, "wb") as f:
+        f.write(b"SS+m" + b"\x01\x00" + b"\x00\x00") # signature, version, reserve
+        f.write(f"Benchmark_{map_name.replace(' ', '_')}\n{map_name}\nBenchmark\n".encode("ASCII")) # id, name, mappers
+        f.write(struct.pack("<IIB", int(notes.ms[-1]) if note_count else 0, note_count, 1)) # last ms, note count, difficulty
+        f.write(b"\x00") # no cover
+        if audio is None:
+            f.write(b"\x00")
+        else:
+            f.write(b"\x01" + struct.pack("<Q", len(audio)))
+            f.write(audio)
+        f.write(_v1_markers(notes) if note_count else b"")
+
+    return filename
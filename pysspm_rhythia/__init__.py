@@ -1,2 +1,2 @@
-from pysspm_rhythia.pysspm import SSPMParser
+from pysspm_rhythia.pysspm import SSPMParser, NoteArray, SSPMStats, CustomValues
 from pysspm_rhythia.__version__ import __version__
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+asyncio versions of reading and writing maps, for use inside async web services.
+
+File reads/writes run on the event loop's default thread pool, and decoding/encoding the markers runs on `executor`
+(the default thread pool if not given, or e.g. a `ProcessPoolExecutor` so big maps dont hold the GIL). The event loop itself never blocks.
+
+```python
+from pysspm_rhythia.aio import read_sspm, write_sspm, read_many
+
+parser = await read_sspm("upload.sspm", columnar=True)
+await write_sspm(parser, "copy.sspm")
+
+async for path, parser, error in read_many(paths, concurrency=4): # at most 4 maps in memory at a time
+    ...
+```
+"""
+import asyncio
+import os
+from functools import partial
+from io import BytesIO
+
+from pysspm_rhythia.pysspm import SSPMParser
+
+
+def _read_file(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_file(path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _decode(data: bytes, kwargs: dict) -> SSPMParser:
+    # module level so it can be sent to process pools. Gets bytes instead of a BytesIO for the same reason
+    return SSPMParser().ReadSSPM(BytesIO(data), **kwargs)
+
+
+def _encode(parser: SSPMParser, kwargs: dict) -> bytes:
+    return parser.WriteSSPM(**kwargs)
+
+
+async def read_sspm(file, executor=None, **kwargs) -> SSPMParser:
+    """
+    `SSPMParser.ReadSSPM` without blocking the event loop. `**kwargs` are passed on (columnar, metadata_only, ...).
+
+    Args:
+        file (str | bytes | BinaryIO): _path, the bytes of a map, or a file object (read on the default thread pool)_
+        executor (Executor, optional): _where the notes are decoded_. Defaults to the loop's default thread pool.
+
+    Returns:
+        SSPMParser: _the parser that read the map_
+    """
+    loop = asyncio.get_running_loop()
+
+    if isinstance(file, (str, os.PathLike)) and (kwargs.get("metadata_only") or kwargs.get("memory_map")):
+        # only a few hundred bytes get read / nothing is read up front, so there is nothing worth splitting up
+        return await loop.run_in_executor(None, partial(SSPMParser().ReadSSPM, os.fspath(file), **kwargs))
+
+    if isinstance(file, (str, os.PathLike)):
+        data = await loop.run_in_executor(None, _read_file, file)
+    elif isinstance(file, (bytes, bytearray, memoryview)):
+        data = bytes(file)
+    else:
+        data = await loop.run_in_executor(None, file.read)
+
+    return await loop.run_in_executor(executor, _decode, data, kwargs)
+
+
+async def write_sspm(parser: SSPMParser, filename=None, executor=None, **kwargs) -> bytes | None:
+    """
+    `SSPMParser.WriteSSPM` without blocking the event loop. The map is encoded on `executor`, then written to `filename`
+    on the default thread pool. `**kwargs` are passed on (map_name, mappers, Notes, ...).
+
+    With a process pool `executor` the parser itself is not updated (WriteSSPM runs on a copy), only the bytes come back.
+
+    Returns:
+        bytes | None: _the map if no filename was given_
+    """
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(executor, _encode, parser, kwargs)
+    if filename is None:
+        return data
+
+    if isinstance(filename, (str, os.PathLike)):
+        await loop.run_in_executor(None, _write_file, filename, data)
+    else:
+        await loop.run_in_executor(None, filename.write, data)
+    return None
+
+
+async def bounded_map(function, items, concurrency: int = 4):
+    """
+    Runs the async `function` on every item with at most `concurrency` running at once, yielding `(item, result, error)`
+    as each one finishes (so one huge map doesnt hold back the results of the small ones). <br>
+    The next item is only taken from `items` (a normal or async iterable) when a slot frees up, so a stream of uploads
+    is never pulled in faster than it can be processed. error is the exception for items that failed, otherwise None.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency has to be at least 1")
+
+    if hasattr(items, "__aiter__"):
+        iterator = items.__aiter__()
+        async def next_item():
+            return await iterator.__anext__()
+    else:
+        iterator = iter(items)
+        async def next_item():
+            try:
+                return next(iterator)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    running = {} # task: item
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(running) < concurrency:
+                try:
+                    item = await next_item()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                running[asyncio.ensure_future(function(item))] = item
+
+            if not running:
+                return
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = running.pop(task)
+                if task.cancelled(): # function cancelled itself, or something it awaited was cancelled
+                    yield item, None, asyncio.CancelledError()
+                elif task.exception() is not None:
+                    yield item, None, task.exception()
+                else:
+                    yield item, task.result(), None
+    finally:
+        # consumer stopped early or got cancelled. Waiting for the cancelled tasks lets them clean up and retrieves their errors
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def read_many(files, concurrency: int = 4, executor=None, **kwargs):
+    """
+    `read_sspm` for many maps, `concurrency` at a time. Yields `(file, parser, error)` as each one finishes (see `bounded_map`)
+    """
+    results = bounded_map(partial(read_sspm, executor=executor, **kwargs), files, concurrency)
+    try:
+        async for item in results:
+            yield item
+    finally: # closes the running reads right away when this one is closed early
+        await results.aclose()
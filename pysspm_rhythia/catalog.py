@@ -0,0 +1,374 @@
+"""
+Builds a catalog (one table of metadata) over whole folders of .sspm files using a process pool.
+
+```python
+from pysspm_rhythia.catalog import build_catalog
+
+records, errors = build_catalog("C:/Users/*/AppData/Roaming/SoundSpacePlus/maps")
+print(len(records), "maps", len(errors), "failed")
+```
+
+Can also be ran from the command line: `sspm-catalog <maps folder> -o catalog.jsonl`
+
+For libraries that get scanned over and over, `update_catalog` keeps the results in a SQLite file and only
+re-reads maps whose size or modified time changed since the last scan.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from pysspm_rhythia.pysspm import SSPMParser
+
+
+CATALOG_FIELDS = (
+    "path", "version", "map_ID", "map_name", "song_name", "mappers", "Difficulty",
+    "note_count", "last_ms", "Hash", "has_audio", "has_cover",
+)
+
+
+def find_maps(directory: str, recursive: bool = True) -> list:
+    """
+    Returns the paths of every .sspm file in `directory` (and sub folders if `recursive`), sorted.
+    """
+    paths = []
+    if recursive:
+        for root, _, files in os.walk(directory):
+            paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".sspm"))
+    else:
+        with os.scandir(directory) as entries:
+            paths.extend(entry.path for entry in entries if entry.is_file() and entry.name.lower().endswith(".sspm"))
+
+    return sorted(paths)
+
+
+def _as_int(value) -> int:
+    return int.from_bytes(value, "little") if isinstance(value, (bytes, bytearray)) else int(value)
+
+
+def read_map_metadata(path: str) -> dict:
+    """
+    Reads one map and returns its catalog record. Only the header and strings are read for V2 maps.
+    """
+    parser = SSPMParser()
+    parser.ReadSSPM(path, metadata_only=True)
+
+    if parser.Header.get("Version") == 1: # audio/cover flags come after the metadata in V1, so read it fully
+        parser = SSPMParser().ReadSSPM(path)
+
+    return {
+        "path": path,
+        "version": parser.Header.get("Version"),
+        "map_ID": parser.map_ID,
+        "map_name": parser.map_name,
+        "song_name": parser.song_name,
+        "mappers": list(parser.mappers),
+        "Difficulty": _as_int(parser.Difficulty),
+        "note_count": _as_int(parser.note_count),
+        "last_ms": _as_int(parser.last_ms),
+        "Hash": parser.Hash.hex() if getattr(parser, "Hash", None) else None, # V1 has no hash
+        "has_audio": parser.contains_audio == b"\x01",
+        "has_cover": parser.contains_cover == b"\x01",
+    }
+
+
+def compute_map_stats(path: str) -> dict:
+    """
+    Derived stats of a map that need the notes: note density (notes per second) and how many notes got each classification.
+    """
+    from pysspm_rhythia.extras import NoteClassifier
+
+    parser = SSPMParser().ReadSSPM(path, columnar=True)
+    notes = parser.Notes
+    if notes is None or len(notes) == 0:
+        return {"note_density": 0.0, "classifications": {}}
+
+    length_s = (int(notes.ms[-1]) - int(notes.ms[0])) / 1000
+
+    return {
+        "note_density": len(notes) / length_s if length_s > 0 else float(len(notes)),
+        "classifications": NoteClassifier(notes).classification_counts(),
+    }
+
+
+def _read_map_entry(path: str, with_stats: bool = False) -> tuple:
+    # metadata and stats for the cache
+    return read_map_metadata(path), compute_map_stats(path) if with_stats else None
+
+
+class _CatchErrors:
+    """
+    Wraps a worker function for `_run_pool`: returns `(result, None)`, or `(None, (item, "ErrorType: message"))` if it raised,
+    so one bad map doesnt stop the pool. A class so process pools can pickle it
+    """
+    __slots__ = ("function",)
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, item) -> tuple:
+        try:
+            return self.function(item), None
+        except Exception as e:
+            return None, (item, f"{type(e).__name__}: {e}")
+
+
+def _run_pool(function, items: list, workers: int = None, chunksize: int = 64, threads: bool = False):
+    # process pool, or a thread pool with `threads`. 1 worker runs everything in this process.
+    # Yields the results in order as they finish, so callers can show progress
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(items) <= 1:
+        yield from map(function, items)
+        return
+
+    with (ThreadPoolExecutor if threads else ProcessPoolExecutor)(max_workers=workers) as pool:
+        yield from pool.map(function, items, chunksize=chunksize)
+
+
+def build_catalog(directory: str | list, workers: int = None, recursive: bool = True, chunksize: int = 64) -> tuple:
+    """
+    Reads the metadata of every map in `directory` across a process pool.
+
+    Args:
+        directory (str | list): _folder to scan, or a list of map paths_
+        workers (int, optional): _amount of processes. 1 reads everything in this process_. Defaults to os.cpu_count().
+        recursive (bool, optional): _also scan sub folders_. Defaults to True.
+        chunksize (int, optional): _maps handed to a worker at a time_. Defaults to 64.
+
+    Returns:
+        tuple: _(records, errors). records is a list of dicts with `CATALOG_FIELDS` keys, errors a list of (path, message)_
+    """
+    paths = find_maps(directory, recursive) if isinstance(directory, (str, os.PathLike)) else list(directory)
+    return _split_results(_run_pool(_CatchErrors(read_map_metadata), paths, workers, chunksize))
+
+
+def _split_results(results) -> tuple:
+    records, errors = [], []
+    for record, error in results:
+        if error:
+            errors.append(error)
+        else:
+            records.append(record)
+    return records, errors
+
+
+def _verify_map(path: str) -> bool:
+    return SSPMParser().VerifySSPM(path)
+
+
+def verify_maps(directory: str | list, workers: int = None, recursive: bool = True) -> tuple:
+    """
+    Checks the hash of every map in `directory` with `SSPMParser.VerifySSPM`. <br>
+    Uses threads instead of processes, hashing is mostly waiting on the disk and hashlib lets go of the GIL while it works.
+
+    Args:
+        directory (str | list): _folder to scan, or a list of map paths_
+        workers (int, optional): _amount of threads_. Defaults to os.cpu_count().
+        recursive (bool, optional): _also scan sub folders_. Defaults to True.
+
+    Returns:
+        tuple: _(results, errors). results is a dict of {path: hash matches}, errors a list of (path, message) for maps that couldnt be checked (V1 maps, broken headers)_
+    """
+    paths = find_maps(directory, recursive) if isinstance(directory, (str, os.PathLike)) else list(directory)
+
+    results, errors = {}, []
+    for path, (valid, error) in zip(paths, _run_pool(_CatchErrors(_verify_map), paths, workers, threads=True)):
+        if error:
+            errors.append(error)
+        else:
+            results[path] = valid
+    return results, errors
+
+
+def _patch_map(path: str, changes: dict) -> None:
+    SSPMParser().PatchSSPM(path, **changes)
+
+
+def patch_maps(directory: str | list, workers: int = None, recursive: bool = True, **changes) -> tuple:
+    """
+    Applies the same `SSPMParser.PatchSSPM` changes (Difficulty, map_name, mappers, ...) to every map in `directory`, across threads.
+    Audio, covers and notes are never read or re-encoded.
+
+    Returns:
+        tuple: _(patched, errors). patched is a list of paths, errors a list of (path, message) for maps that couldnt be patched (V1 maps, broken headers)_
+    """
+    paths = find_maps(directory, recursive) if isinstance(directory, (str, os.PathLike)) else list(directory)
+
+    patched, errors = [], []
+    for path, (_, error) in zip(paths, _run_pool(_CatchErrors(partial(_patch_map, changes=changes)), paths, workers, threads=True)):
+        if error:
+            errors.append(error)
+        else:
+            patched.append(path)
+    return patched, errors
+
+
+class CatalogCache:
+    """
+    # Catalog Cache
+
+    ### SQLite file holding catalog records (and optional stats) keyed by path, file size and modified time.
+
+    ```python
+    with CatalogCache("catalog.db") as cache:
+        record = cache.get(path, size, mtime_ns) # None if missing or the file changed
+    ```
+    """
+
+    COLUMNS = CATALOG_FIELDS[1:] # path is the key
+
+    def __init__(self, database: str):
+        self.connection = sqlite3.connect(database)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS maps ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            + ", ".join(f"{column} {'TEXT' if column in ('map_ID', 'map_name', 'song_name', 'mappers', 'Hash') else 'INTEGER'}" for column in self.COLUMNS)
+            + ", stats TEXT)"
+        )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def entries(self) -> dict:
+        """
+        Returns `{path: (size, mtime_ns, has_stats)}` for every cached map
+        """
+        rows = self.connection.execute("SELECT path, size, mtime_ns, stats IS NOT NULL FROM maps")
+        return {path: (size, mtime_ns, bool(has_stats)) for path, size, mtime_ns, has_stats in rows}
+
+    def get(self, path: str, size: int = None, mtime_ns: int = None) -> dict | None:
+        """
+        Returns the cached record of `path` (with a "stats" key). None if it isnt cached or size/mtime dont match
+        """
+        row = self.connection.execute(f"SELECT size, mtime_ns, {', '.join(self.COLUMNS)}, stats FROM maps WHERE path = ?", (path,)).fetchone()
+        if row is None or (size is not None and row[0] != size) or (mtime_ns is not None and row[1] != mtime_ns):
+            return None
+        return self._to_record(path, row[2:])
+
+    def put(self, record: dict, size: int, mtime_ns: int, stats: dict = None) -> None:
+        values = [record["path"], size, mtime_ns]
+        values += [json.dumps(record[column]) if column == "mappers" else record[column] for column in self.COLUMNS]
+        values.append(json.dumps(stats) if stats is not None else None)
+
+        self.connection.execute(f"INSERT OR REPLACE INTO maps VALUES ({', '.join('?' * len(values))})", values)
+
+    def remove(self, paths) -> None:
+        self.connection.executemany("DELETE FROM maps WHERE path = ?", ((path,) for path in paths))
+
+    def records(self) -> list:
+        """
+        Returns every cached record sorted by path
+        """
+        rows = self.connection.execute(f"SELECT path, {', '.join(self.COLUMNS)}, stats FROM maps ORDER BY path")
+        return [self._to_record(row[0], row[1:]) for row in rows]
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def _to_record(self, path: str, row: tuple) -> dict:
+        record = {"path": path, **dict(zip(self.COLUMNS, row[:-1]))}
+        record["mappers"] = json.loads(record["mappers"])
+        record["has_audio"] = bool(record["has_audio"])
+        record["has_cover"] = bool(record["has_cover"])
+        record["stats"] = json.loads(row[-1]) if row[-1] is not None else None
+        return record
+
+
+def update_catalog(directory: str, database: str, workers: int = None, recursive: bool = True, with_stats: bool = False, chunksize: int = 64) -> tuple:
+    """
+    Same as `build_catalog` but keeps results in a SQLite file (see `CatalogCache`). <br>
+    Maps whose path, size and modified time are unchanged since the last run are not read again, and
+    maps that no longer exist are dropped from the cache.
+
+    Args:
+        directory (str): _folder to scan_
+        database (str): _path of the SQLite file. Created if missing_
+        workers (int, optional): _amount of processes_. Defaults to os.cpu_count().
+        recursive (bool, optional): _also scan sub folders_. Defaults to True.
+        with_stats (bool, optional): _also store note density and classification counts (reads the notes)_. Defaults to False.
+
+    Returns:
+        tuple: _(records, errors). Records also have a "stats" key (None without `with_stats`)_
+    """
+    paths = find_maps(directory, recursive)
+
+    with CatalogCache(database) as cache:
+        cached = cache.entries()
+        stale = []
+        for path in paths:
+            stat = os.stat(path)
+            entry = cached.get(path)
+            if entry is None or entry[:2] != (stat.st_size, stat.st_mtime_ns) or (with_stats and not entry[2]):
+                stale.append((path, stat.st_size, stat.st_mtime_ns))
+
+        results = _run_pool(_CatchErrors(partial(_read_map_entry, with_stats=with_stats)), [path for path, _, _ in stale], workers, chunksize)
+
+        errors = []
+        for (path, size, mtime_ns), (entry, error) in zip(stale, results):
+            if error:
+                errors.append(error)
+                cache.remove([path])
+            else:
+                cache.put(entry[0], size, mtime_ns, entry[1])
+
+        cache.remove(set(cached) - set(paths))
+        cache.commit()
+
+        return cache.records(), errors
+
+
+def write_catalog(records: list, output, file_format: str = "jsonl") -> None:
+    """
+    Writes catalog records to a text file handle as json lines, a json list or csv (mappers joined by ", ").
+    """
+    if file_format == "jsonl":
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+    elif file_format == "json":
+        json.dump(records, output, indent=1)
+    elif file_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=CATALOG_FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, "mappers": ", ".join(record["mappers"])})
+    else:
+        raise ValueError("Unknown catalog format. Use jsonl, json or csv. FOUND:", file_format)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="sspm-catalog", description="Builds a metadata catalog of a folder of .sspm maps")
+    parser.add_argument("directory", help="folder containing .sspm files")
+    parser.add_argument("-o", "--output", help="file to write the catalog to (defaults to stdout)")
+    parser.add_argument("-f", "--format", choices=("jsonl", "json", "csv"), default="jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="amount of processes (defaults to cpu count)")
+    parser.add_argument("--no-recursive", action="store_true", help="only scan the top folder")
+    args = parser.parse_args(argv)
+
+    records, errors = build_catalog(args.directory, workers=args.workers, recursive=not args.no_recursive)
+
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8", newline="") as f:
+            write_catalog(records, f, args.format)
+    else:
+        write_catalog(records, sys.stdout, args.format)
+
+    for path, message in errors:
+        print(f"Failed to read {path}: {message}", file=sys.stderr)
+    print(f"{len(records)} maps cataloged, {len(errors)} failed", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Converts whole folders of .sspm files across a process pool, to `NOTES2TEXT` text, JSON metadata or a columnar notes dump (.npz with x, y, ms, quantum).
+
+```python
+from pysspm_rhythia.convert import convert_maps
+
+converted, skipped, errors = convert_maps("maps/", "text/", file_format="text")
+```
+
+Can also be ran from the command line: `sspm-convert <maps folder> <output folder> -f text`
+
+Outputs keep the folder structure of the input. They are written to a `.part` file and renamed when done, so an
+interrupted run can just be started again: outputs that exist and are newer than their map are skipped (unless `force`).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from pysspm_rhythia.pysspm import SSPMParser, NoteArray
+from pysspm_rhythia.catalog import _CatchErrors, _run_pool, find_maps, read_map_metadata
+
+
+OUTPUT_SUFFIXES = {
+    "text": ".txt",
+    "json": ".json",
+    "columnar": ".npz",
+}
+
+
+def output_path(path: str, directory: str, output_dir: str, file_format: str) -> str:
+    """
+    Where the output of the map `path` (found in `directory`) goes: same relative path under `output_dir` with the format's suffix.
+    """
+    relative = os.path.relpath(path, directory)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + OUTPUT_SUFFIXES[file_format])
+
+
+def is_converted(path: str, output: str) -> bool:
+    """
+    True if `output` exists and is at least as new as the map, meaning it was fully written after the map last changed.
+    """
+    try:
+        return os.stat(output).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def convert_map(path: str, output: str, file_format: str = "text", chunk_size: int = 65536) -> int:
+    """
+    Converts one map. Text is written `chunk_size` notes at a time and the map is memory mapped, so the audio is never loaded.
+
+    Returns:
+        int: _amount of notes in the map_
+    """
+    if file_format not in OUTPUT_SUFFIXES:
+        raise ValueError("Unknown output format. Use text, json or columnar. FOUND:", file_format)
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    temporary = output + ".part"
+
+    try:
+        if file_format == "json":
+            record = read_map_metadata(path)
+            with open(temporary, "w", encoding="UTF-8") as f:
+                json.dump(record, f, indent=1)
+            note_count = record["note_count"]
+        else:
+            parser = SSPMParser().ReadSSPM(path, columnar=True, memory_map=True)
+            notes = parser.Notes # None for maps without note markers, those get an empty output
+            note_count = len(notes) if notes is not None else 0
+            if file_format == "text":
+                with open(temporary, "w", encoding="UTF-8") as f:
+                    if notes is not None:
+                        parser.NOTES2TEXT(f, chunk_size)
+            else:
+                import numpy as np
+                if notes is None:
+                    notes = NoteArray(np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.uint32), np.empty(0, dtype=bool))
+                with open(temporary, "wb") as f:
+                    np.savez(f, x=notes.x, y=notes.y, ms=notes.ms, quantum=notes.quantum)
+            del parser, notes # release the memory map before the next map
+
+        os.replace(temporary, output)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+    return note_count
+
+
+def _convert_job(job: tuple) -> int:
+    return convert_map(*job)
+
+
+def convert_maps(directory: str | list, output_dir: str, file_format: str = "text", workers: int = None, recursive: bool = True, force: bool = False, progress=None) -> tuple:
+    """
+    Converts every map in `directory` into `output_dir` across a process pool.
+
+    Args:
+        directory (str | list): _folder to scan, or a list of map paths (outputs then keep their path from the folder they all share)_
+        output_dir (str): _folder to write the outputs to_
+        file_format (str, optional): _"text", "json" or "columnar"_. Defaults to "text".
+        workers (int, optional): _amount of processes. 1 converts everything in this process_. Defaults to os.cpu_count().
+        recursive (bool, optional): _also scan sub folders_. Defaults to True.
+        force (bool, optional): _convert maps again even if their output is up to date_. Defaults to False.
+        progress (callable, optional): _called as `progress(done, total, notes, nbytes)` after every map_.
+
+    Returns:
+        tuple: _(converted output paths, skipped output paths, [(path, error message), ...])_
+    """
+    if file_format not in OUTPUT_SUFFIXES:
+        raise ValueError("Unknown output format. Use text, json or columnar. FOUND:", file_format)
+
+    if isinstance(directory, (list, tuple)):
+        # outputs keep their path from the folder the maps have in common, so a/x.sspm and b/x.sspm dont write to the same file
+        paths = list(directory)
+        directory = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else "."
+    else:
+        paths = find_maps(directory, recursive)
+
+    jobs, skipped = [], []
+    for path in paths:
+        output = output_path(path, directory, output_dir, file_format)
+        if not force and is_converted(path, output):
+            skipped.append(output)
+        else:
+            jobs.append((path, output, file_format))
+
+    converted, errors = [], []
+    notes = nbytes = 0
+    chunksize = max(1, min(16, len(jobs) // ((workers or os.cpu_count() or 1) * 4))) # small chunks so progress moves steadily
+    results = _run_pool(_CatchErrors(_convert_job), jobs, workers, chunksize)
+
+    for done, ((path, output, _), (note_count, error)) in enumerate(zip(jobs, results), 1):
+        if error is None:
+            converted.append(output)
+            notes += note_count
+            nbytes += os.path.getsize(path)
+        else:
+            errors.append((path, error[1]))
+        if progress is not None:
+            progress(done, len(jobs), notes, nbytes)
+
+    return converted, skipped, errors
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="sspm-convert", description="Converts a folder of .sspm maps to text, JSON metadata or columnar notes")
+    parser.add_argument("directory", help="folder containing .sspm files")
+    parser.add_argument("output", help="folder to write the outputs to (keeps the folder structure)")
+    parser.add_argument("-f", "--format", choices=tuple(OUTPUT_SUFFIXES), default="text")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="amount of processes (defaults to cpu count)")
+    parser.add_argument("--no-recursive", action="store_true", help="only scan the top folder")
+    parser.add_argument("--force", action="store_true", help="convert everything again, even maps with an up to date output")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress line")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    def progress(done, total, notes, nbytes):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"\r{done}/{total} maps  {done / elapsed:.1f} maps/s  {notes / elapsed:,.0f} notes/s  {nbytes / 1e6 / elapsed:.1f} MB/s", end="", file=sys.stderr, flush=True)
+
+    converted, skipped, errors = convert_maps(args.directory, args.output, args.format, workers=args.workers, recursive=not args.no_recursive, force=args.force, progress=None if args.quiet else progress)
+    if (converted or errors) and not args.quiet:
+        print(file=sys.stderr)
+
+    for path, message in errors:
+        print(f"Failed to convert {path}: {message}", file=sys.stderr)
+    print(f"{len(converted)} maps converted, {len(skipped)} already done, {len(errors)} failed in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Finds duplicate and near-duplicate maps in a collection.
+
+Exact duplicates share the marker hash (the SHA-1 `WriteSSPM` stores in the header). Near duplicates
+(re-uploads with a shifted offset, or a few notes edited) are found with a MinHash of the note pattern, and
+an LSH index so looking up one new map only compares it against maps in the same buckets.
+
+```python
+from pysspm_rhythia.catalog import find_maps
+from pysspm_rhythia.dedup import DedupIndex
+
+index = DedupIndex()
+index.add_maps(find_maps("maps/"))
+print(index.duplicate_groups()) # [[path, path], ...] same markers
+print(index.near_duplicate_groups(0.8)) # [[path, path, path], ...] similar notes
+
+matches = index.query_map("upload.sspm") # {"exact": [...], "near": [(path, similarity), ...]}
+```
+"""
+from collections import defaultdict
+from hashlib import sha1
+from itertools import chain
+
+import numpy as np
+
+from pysspm_rhythia.catalog import _CatchErrors, _run_pool
+from pysspm_rhythia.pysspm import SSPMParser
+
+
+NUM_PERM = 64 # minhash size. Similarity estimates are off by ~1/sqrt(NUM_PERM)
+BANDS = 16 # LSH bands of NUM_PERM // BANDS rows. Maps ~50% similar have even odds of sharing a bucket
+SHINGLE_SIZE = 3 # notes per shingle. Editing one note changes at most this many shingles
+TIME_STEP = 5 # ms. Gaps between notes are rounded to this before hashing
+POSITION_STEP = 0.5 # x/y are rounded to this before hashing
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+_PERMUTATIONS = np.random.default_rng(0x55504D).integers(1, 2**63, size=(2, NUM_PERM), dtype=np.uint64) | np.uint64(1)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finaliser. uint64 math wraps around which is what we want here
+    with np.errstate(over="ignore"):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def note_shingles(x, y, ms, shingle_size: int = SHINGLE_SIZE, time_step: int = TIME_STEP, position_step: float = POSITION_STEP) -> np.ndarray:
+    """
+    Hashes every run of `shingle_size` notes (sorted by time) into a uint64. <br>
+    Each note contributes its rounded position and the rounded gap since the note before it, so moving the whole map in time gives the same shingles.
+
+    Returns:
+        np.ndarray: _unique shingle hashes_
+    """
+    ms = np.asarray(ms, dtype=np.int64)
+    order = np.argsort(ms, kind="stable")
+    ms = ms[order]
+
+    gaps = np.rint(np.diff(ms, prepend=ms[:1]) / time_step).astype(np.int64)
+    gaps[:1] = 0 # first note has nothing before it
+    qx = np.rint(np.asarray(x, dtype=np.float64)[order] / position_step).astype(np.int64)
+    qy = np.rint(np.asarray(y, dtype=np.float64)[order] / position_step).astype(np.int64)
+
+    # one value per note: 16 bits each for x and y, the rest for the gap
+    notes = ((gaps << 32) ^ ((qx & 0xFFFF) << 16) ^ (qy & 0xFFFF)).astype(np.uint64)
+    notes = _mix(notes)
+
+    count = len(notes) - shingle_size + 1
+    if count <= 0:
+        return np.unique(_mix(notes)) if len(notes) else notes
+
+    shingles = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for i in range(shingle_size):
+            shingles = _mix(shingles * np.uint64(31) + notes[i:i + count])
+    return np.unique(shingles)
+
+
+def minhash(shingles: np.ndarray, num_perm: int = NUM_PERM) -> np.ndarray:
+    """
+    MinHash signature of a set of uint64 shingles. The fraction of equal values between two signatures estimates their Jaccard similarity.
+    """
+    signature = np.full(num_perm, _MASK64, dtype=np.uint64)
+    a, b = _PERMUTATIONS[0, :num_perm], _PERMUTATIONS[1, :num_perm]
+    for start in range(0, len(shingles), 4096): # keeps the shingles x perms block small
+        block = shingles[start:start + 4096, None]
+        with np.errstate(over="ignore"):
+            signature = np.minimum(signature, _mix(block * a + b).min(axis=0))
+    return signature
+
+
+def marker_hash(parser: SSPMParser) -> bytes:
+    """
+    Hash of the markers of a read map. The stored `Hash` for V2, and for V1 (which has none) the hash `WriteSSPM` would store.
+    """
+    if getattr(parser, "Hash", None):
+        return bytes(parser.Hash)
+
+    markers, _ = parser._EncodeMarkers(parser.Notes if parser.Notes is not None else [])
+    note_definition = b"ssp_note"
+    hashed = sha1(b"\x01" + len(note_definition).to_bytes(2, "little") + note_definition + b"\x01\x07\x00")
+    hashed.update(markers)
+    return hashed.digest()
+
+
+def map_signature(path: str) -> tuple:
+    """
+    Reads a map and returns `(marker hash, minhash signature)`. The signature is None for maps with less than
+    `SHINGLE_SIZE` notes, they have no note pattern to compare (every empty map would look the same)
+    """
+    parser = SSPMParser().ReadSSPM(path, columnar=True)
+    notes = parser.Notes # None for maps without note markers
+    if notes is None or len(notes) < SHINGLE_SIZE:
+        return marker_hash(parser), None
+    return marker_hash(parser), minhash(note_shingles(notes.x, notes.y, notes.ms))
+
+
+class DedupIndex:
+    """
+    # Dedup Index
+
+    ### Index of maps by marker hash (exact duplicates) and by LSH buckets of their minhash (near duplicates)
+
+    Keys can be anything hashable, `add_map`/`add_maps` use the file path.
+    Maps added with a None signature (too few notes) are only matched by marker hash, and never grouped as near duplicates.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm has to be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hashes = {} # key: marker hash
+        self.signatures = {} # key: minhash signature
+        self.by_hash = defaultdict(set)
+        self.buckets = defaultdict(set) # (band, band bytes): keys
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, key) -> bool:
+        return key in self.signatures
+
+    def _band_keys(self, signature: np.ndarray):
+        if signature is None:
+            return
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key, exact_hash: bytes, signature: np.ndarray) -> None:
+        if key in self.signatures:
+            self.remove(key)
+
+        self.hashes[key] = exact_hash
+        self.signatures[key] = signature
+        self.by_hash[exact_hash].add(key)
+        for band_key in self._band_keys(signature):
+            self.buckets[band_key].add(key)
+
+    def add_map(self, path: str) -> None:
+        self.add(path, *map_signature(path))
+
+    def add_maps(self, paths: list, workers: int = None, chunksize: int = 16) -> list:
+        """
+        Reads and adds many maps across a process pool. Returns a list of (path, message) for maps that failed to read
+        """
+        paths = list(paths)
+        errors = []
+        for path, (result, error) in zip(paths, _run_pool(_CatchErrors(map_signature), paths, workers, chunksize)):
+            if error:
+                errors.append(error)
+            else:
+                self.add(path, *result)
+        return errors
+
+    def remove(self, key) -> None:
+        exact_hash = self.hashes.pop(key)
+        signature = self.signatures.pop(key)
+
+        self.by_hash[exact_hash].discard(key)
+        if not self.by_hash[exact_hash]:
+            del self.by_hash[exact_hash]
+        for band_key in self._band_keys(signature):
+            self.buckets[band_key].discard(key)
+            if not self.buckets[band_key]:
+                del self.buckets[band_key]
+
+    def similarity(self, a, b) -> float:
+        """
+        Estimated Jaccard similarity of the note patterns of two indexed maps. 0 if either has no signature
+        """
+        if self.signatures[a] is None or self.signatures[b] is None:
+            return 0.0
+        return float(np.mean(self.signatures[a] == self.signatures[b]))
+
+    def query(self, exact_hash: bytes, signature: np.ndarray, threshold: float = 0.5, exclude=None) -> dict:
+        """
+        Looks up maps matching a hash/signature. Only maps sharing an LSH bucket are compared.
+
+        Returns:
+            dict: _{"exact": [keys with the same marker hash], "near": [(key, similarity), ...] most similar first}_
+        """
+        exact = sorted((key for key in self.by_hash.get(exact_hash, ()) if key != exclude), key=str)
+
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates |= self.buckets.get(band_key, set())
+        candidates.discard(exclude)
+        candidates.difference_update(exact)
+
+        near = [(key, float(np.mean(self.signatures[key] == signature))) for key in candidates]
+        near = sorted((match for match in near if match[1] >= threshold), key=lambda match: (-match[1], str(match[0])))
+
+        return {"exact": exact, "near": near}
+
+    def query_map(self, path: str, threshold: float = 0.5) -> dict:
+        """
+        Same as `query` for a map file. The map itself is left out if it's already in the index
+        """
+        return self.query(*map_signature(path), threshold=threshold, exclude=path)
+
+    def duplicate_groups(self) -> list:
+        """
+        Groups of 2 or more maps with the exact same markers
+        """
+        return sorted(sorted(keys, key=str) for keys in self.by_hash.values() if len(keys) > 1)
+
+    def near_duplicate_groups(self, threshold: float = 0.8) -> list:
+        """
+        Groups of maps connected by pairs with an estimated similarity of at least `threshold` (exact duplicates included).
+        Maps without a signature are left out, see `map_signature`
+        """
+        parent = {}
+
+        def find(key):
+            while parent[key] != key:
+                key = parent[key]
+            return key
+
+        checked = set()
+        for keys in chain(self.buckets.values(), self.by_hash.values()):
+            if len(keys) < 2:
+                continue
+            keys = sorted((key for key in keys if self.signatures[key] is not None), key=str)
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    if (a, b) in checked:
+                        continue
+                    checked.add((a, b))
+                    if self.hashes[a] == self.hashes[b] or self.similarity(a, b) >= threshold:
+                        parent.setdefault(a, a)
+                        parent.setdefault(b, b)
+                        parent[find(b)] = find(a)
+
+        groups = defaultdict(list)
+        for key in parent:
+            groups[find(key)].append(key)
+        return sorted(sorted(keys, key=str) for keys in groups.values() if len(keys) > 1)
+
@@ -1,25 +1,56 @@
 """
 Collection of items I created that I thought I might import into the library in case anyone finds them useful
 """
-from types import NoneType
 import numpy as np
 from collections import defaultdict
+from itertools import chain
 import math
-from pysspm import SSPMParser
+from pysspm_rhythia.pysspm import SSPMParser, NoteArray
 
-def calcObsiidRating(self: SSPMParser, notes: list = None) -> SSPMParser:
+OBSIID_SCALE = 0.5 # a 150ms stream moving 1 grid unit per note is ~6.7
+
+
+def calcObsiidRating(self: SSPMParser | NoteArray | list | tuple, notes: list = None) -> float:
     """
     calculates difficulty by using Obsiids difficulty calculation.
-    This method is essentially just the dot product of the notes
+    This method is essentially just the dot product of the notes: `(1 + distance moved)` between every pair of notes
+    dotted with `1 / time between them` (at least `MIN_DELTA_MS`), averaged over the map.
+
+    Takes a parser, a `NoteArray`, a list of `(x, y, ms)` notes, or a tuple of `(x, y, ms)` arrays. `notes` overrides the parsers notes.
+    """
+    return float(calcObsiidRatings([self if notes is None else notes])[0])
+
+
+def calcObsiidRatings(maps: list) -> np.ndarray:
+    """
+    `calcObsiidRating` for many maps at once. The notes of every map are put in one set of columns so the
+    whole batch is a handful of array operations, no matter how many maps there are.
+
+    `maps` can hold anything `calcObsiidRating` takes, or paths (read memory mapped, so audio/cover are never copied).
+
+    Returns:
+        np.ndarray: _float64 rating per map, in the same order. Maps with less than 2 notes are rated 0_
     """
+    columns = []
+    for source in maps:
+        if isinstance(source, str):
+            source = SSPMParser().ReadSSPM(source, columnar=True, memory_map=True)
+        columns.append(_note_columns(source))
 
-    print(self.Notes[1:5])
+    lengths = np.array([len(ms) for _, _, ms in columns], dtype=np.int64)
+    if lengths.sum() < 2:
+        return np.zeros(len(columns))
+    x, y, ms = (np.concatenate([column[i] for column in columns]) for i in range(3))
 
-    if not notes: # if we pass in notes
-        pass
-    raise NotImplementedError("CalcObsiidRating function is a W.I.P.")
+    # gap i is between note i and note i + 1. Gaps across two maps get no weight
+    note_owner = np.repeat(np.arange(len(columns)), lengths)
+    owner = note_owner[1:]
+    movement = 1 + np.hypot(np.diff(x), np.diff(y))
+    inverse_time = 1000 / np.maximum(np.diff(ms), MIN_DELTA_MS)
+    inverse_time[owner != note_owner[:-1]] = 0
 
-    return self
+    totals = np.bincount(owner, weights=movement * inverse_time, minlength=len(columns))
+    return OBSIID_SCALE * totals / np.maximum(lengths - 1, 1)
 
 
 def calcPPRating(self: SSPMParser) -> float:
@@ -28,13 +59,109 @@ def calcPPRating(self: SSPMParser) -> float:
     """
     return len(self.Notes) / 100 
 
-def calcStarRating(self: SSPMParser) -> float:
+STRAIN_DECAY = 0.15 # fraction of strain left after 1 second without notes
+DISTANCE_WEIGHT = 1.0 # how much a grid unit of movement adds to a notes strain
+MIN_DELTA_MS = 25 # notes closer than this (chords, meganotes) are treated as this far apart
+SECTION_MS = 400 # strain peaks are taken per section of this length
+PEAK_WEIGHT = 0.9 # each next hardest section counts this much less
+STAR_SCALE = 0.25 # a 150ms stream moving 1 grid unit per note is ~6
+
+
+def _note_columns(source) -> tuple:
+    """
+    x, y, ms as float64 arrays sorted by time from a parser, a `NoteArray`, a list of `(x, y, ms)` or a tuple of `(x, y, ms)` arrays
+    """
+    if hasattr(source, "Notes"): # a parser
+        source = source.Notes
+    if source is None: # maps without note markers
+        source = ()
+    if hasattr(source, "ms"): # a NoteArray
+        x, y, ms = source.x, source.y, source.ms
+    elif isinstance(source, tuple) and len(source) == 3 and isinstance(source[0], np.ndarray):
+        x, y, ms = source
+    else:
+        columns = np.array(source, dtype=np.float64).reshape(-1, 3)
+        x, y, ms = columns[:, 0], columns[:, 1], columns[:, 2]
+
+    x, y, ms = (np.asarray(column, dtype=np.float64) for column in (x, y, ms))
+    if len(ms) > 1 and (np.diff(ms) < 0).any():
+        order = np.argsort(ms, kind="stable")
+        x, y, ms = x[order], y[order], ms[order]
+    return x, y, ms
+
+
+def _decayed_sum(values: np.ndarray, times: np.ndarray, rate: float) -> np.ndarray:
+    # strain[i] = sum of values[k] * exp(-rate * (times[i] - times[k])) for k <= i, as cumulative sums.
+    # exp(rate * t) overflows on long maps so the sums restart (carrying the strain over) every ~500/rate ms
+    strain = np.empty(len(values))
+    limit = 500 / rate
+    carry, last_time = 0.0, times[0] if len(times) else 0.0
+    start = 0
+    while start < len(values):
+        base = times[start]
+        end = int(np.searchsorted(times, base + limit, side="right"))
+        offsets = times[start:end] - base
+        carry *= np.exp(-rate * (base - last_time))
+        strain[start:end] = np.exp(-rate * offsets) * (carry + np.cumsum(values[start:end] * np.exp(rate * offsets)))
+        carry, last_time = strain[end - 1], times[end - 1]
+        start = end
+    return strain
+
+
+def calcStarRating(self: SSPMParser | NoteArray | list | tuple) -> tuple:
     """
-    # Pseudo-code outline:
+    Strain based difficulty. Every note adds `(1 + distance moved) / time since the last note` to a strain that decays
+    exponentially over time (`STRAIN_DECAY` left after a second). The hardest strain of each `SECTION_MS` part of the map
+    is weighted (hardest first, each next one `PEAK_WEIGHT` times less) and summed into the rating.
 
-    - get notes [0, 0, 100, 1, 0, 150]
-    - apply exponential decay (of some sorts)
+    Takes a parser, a `NoteArray`, a list of `(x, y, ms)` notes, or a tuple of `(x, y, ms)` arrays.
+
+    Returns:
+        tuple: _(star rating, timeline). timeline is a structured array with "ms" and "strain" for every note in time order_
     """
+    x, y, ms = _note_columns(self)
+    timeline = np.zeros(len(ms), dtype=[("ms", np.float64), ("strain", np.float64)])
+    timeline["ms"] = ms
+    if len(ms) < 2:
+        return 0.0, timeline
+
+    distance = np.hypot(np.diff(x), np.diff(y))
+    delta = np.maximum(np.diff(ms), MIN_DELTA_MS) / 1000
+    values = np.concatenate(([0.0], (1 + DISTANCE_WEIGHT * distance) / delta))
+
+    strain = _decayed_sum(values, ms - ms[0], -math.log(STRAIN_DECAY) / 1000)
+    timeline["strain"] = strain
+
+    sections = ((ms - ms[0]) // SECTION_MS).astype(np.int64)
+    starts = np.flatnonzero(np.diff(sections, prepend=-1))
+    peaks = np.sort(np.maximum.reduceat(strain, starts))[::-1]
+    weighted = float(np.dot(peaks, PEAK_WEIGHT ** np.arange(len(peaks))))
+
+    return STAR_SCALE * math.sqrt(weighted), timeline
+
+
+def _star_rating_of_file(path: str) -> float:
+    parser = SSPMParser().ReadSSPM(path, columnar=True, memory_map=True) # audio/cover are never copied
+    return calcStarRating(parser)[0]
+
+
+def calcStarRatings(maps: str | list, workers: int = None, chunksize: int = 16) -> tuple:
+    """
+    `calcStarRating` for every map in a folder (or list of paths) across a process pool.
+
+    Returns:
+        tuple: _(ratings, errors). ratings is a dict of {path: star rating}, errors a list of (path, message)_
+    """
+    from pysspm_rhythia.catalog import _CatchErrors, _run_pool, find_maps
+
+    paths = find_maps(maps) if isinstance(maps, str) else list(maps)
+    ratings, errors = {}, []
+    for path, (rating, error) in zip(paths, _run_pool(_CatchErrors(_star_rating_of_file), paths, workers, chunksize)):
+        if error:
+            errors.append(error)
+        else:
+            ratings[path] = rating
+    return ratings, errors
 
 class Note:
     NOTECLASSES = {
@@ -43,6 +170,8 @@ class Note:
         "misc": ("stack", "meganote", "quantum", "offgrid") # fits under both spiral and jumpstream
     }
 
+    __slots__ = ("x", "y", "ms", "dx", "dy", "dt", "dh", "note", "classifications")
+
     def __init__(self, 
                  x: float | int = None, 
                  y: float | int = None, 
@@ -50,7 +179,7 @@ class Note:
                  note: tuple = None, 
                  hyp: float | int = None, 
                  vector: tuple = None, 
-                 classifications: list = []) -> None:
+                 classifications: list = None) -> None:
         """_WORK IN PROGRESS_
 
         Args:
@@ -60,7 +189,7 @@ class Note:
             note (tuple, optional): _tuple form of notes | overrides x, y, ms if used_. Defaults to None.
             hyp (float | int, optional): _hypotenuse of 2 points_. Defaults to None.
             vector (tuple, optional): _vector class done from classifications_. Defaults to None.
-            classifications (tuple, optional): _classifications of notetype_. Defaults to None.
+            classifications (list, optional): _classifications of notetype_. Defaults to a new empty list.
 
         Returns:
             None: _description_
@@ -83,9 +212,44 @@ class Note:
             self.dx = self.dy = self.dt = self.dh = 0
 
         self.note = (self.x, self.y, self.ms)
-        # Classifications
-        self.classifications = classifications
+        # Classifications | new list per note, a shared default list would collect every notes labels
+        self.classifications = classifications if classifications is not None else []
+
+
+class NoteVectors:
+    """
+    List-like view of a `NoteClassifier`s columns that gives `Note` objects. <br>
+    A `Note` is only made the first time its index is accessed, then kept (on the classifier) so changes made to it (classifications) stay.
+    """
+
+    __slots__ = ("classifier",)
 
+    def __init__(self, classifier: "NoteClassifier") -> None:
+        self.classifier = classifier
+
+    def __len__(self) -> int:
+        return len(self.classifier.dh)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("note index out of range")
+
+        c = self.classifier
+        note = c._note_cache.get(index)
+        if note is None:
+            dt = float(c.dt[index])
+            vector = (float(c.dx[index]), float(c.dy[index]), int(dt) if dt.is_integer() else dt, float(c.dh[index])) if index else None
+            note = c._note_cache[index] = Note(note=tuple(c.notes[index]), vector=vector, classifications=c.classifications_at(index))
+        return note
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
 
 
 class NoteClassifier():
@@ -95,6 +259,19 @@ class NoteClassifier():
         "misc": ("stack", "meganote", "quantum", "offgrid") # fits under both spiral and jumpstream
     }
 
+    CLASSIFICATION_BITS = { # bits of classification_mask
+        "jumpstream": 1 << 0,
+        "spiral": 1 << 1,
+        "stack": 1 << 2,
+        "meganote": 1 << 3,
+        "quantum": 1 << 4,
+        "offgrid": 1 << 5,
+        "short-slide": 1 << 6,
+        "medium-slide": 1 << 7,
+    }
+    MEGANOTE, STACK, SHORT_SLIDE, MEDIUM_SLIDE = 1, 2, 3, 4 # codes used in the kind columns
+    KIND_NAMES = {MEGANOTE: "meganote", STACK: "stack", SHORT_SLIDE: "short-slide", MEDIUM_SLIDE: "medium-slide"}
+
     def __init__(self, notes, time_multiplier=5):
         """_WORK IN PROGRESS_
 
@@ -102,65 +279,87 @@ class NoteClassifier():
             notes (_type_): _description_
             time_multiplier (int, optional): _description_. Defaults to 5.
         """
-        self.notes = sorted(notes, key=lambda n: n[2])  # Sort by time
+        self.notes = notes.sorted() if isinstance(notes, NoteArray) else sorted(notes, key=lambda n: n[2])  # Sort by time
         self.time_multiplier = time_multiplier
-        self.NoteData = self.compute_vectors()
+        self.classification_mask = None
+        self._classification_parts = None
+        self._note_cache = {} # Notes made by NoteData, index: Note
+        self.compute_vectors()
         #print(self.vectors[0:500])
 
         self.patterns = []
         #self.classified_notes = set()
 
+    @property
+    def NoteData(self) -> NoteVectors:
+        """
+        The notes as `Note` objects (with vectors, and classifications after `detect_sequences`), made when accessed
+        """
+        return NoteVectors(self)
+
+    @NoteData.setter
+    def NoteData(self, notes) -> None:
+        # Assigning Note objects (or (x, y, ms) tuples) replaces the notes. Columns are rebuilt from them,
+        # classifications on the Note objects are kept until detect_sequences runs again
+        notes = list(notes)
+        self.notes = [note.note if isinstance(note, Note) else tuple(note) for note in notes]
+        self.classification_mask = None
+        self._classification_parts = None
+        self.compute_vectors()
+        self._note_cache = {i: note for i, note in enumerate(notes) if isinstance(note, Note)}
+
     def classify_patterns(self):
         NoteData = self.detect_sequences()
         return NoteData
         #return dict(self.patterns)
 
-    def compute_vectors(self):
-        """Compute the movement vectors between consecutive notes."""
-        NoteData = [Note(note=self.notes[0], vector=None)]
-        for i in range(1, len(self.notes)):
-            x1, y1, t1 = self.notes[i-1]
-            x2, y2, t2 = self.notes[i]
-            vector = (abs(x2 - x1), abs(y2 - y1), abs(t2 - t1), round(math.hypot(abs(x2 - x1), abs(y2 - y1)), 2))# max((x2 - x1), abs(y2 - y1)))#  # |(dx, dy, dt, dxy)| = |(dx, dy, dt, math.sqrt((p*p)+(b*b)))|
-            NoteClass = Note(note=self.notes[i], vector=vector)
-            NoteData.append(NoteClass) # last one should always go up but if it doesnt then whatever
-
-        return NoteData
+    def compute_vectors(self) -> NoteVectors:
+        """
+        Compute the movement vectors between consecutive notes. <br>
+        Sets the columns `x`, `y`, `ms`, `dx`, `dy`, `dt` and `dh` (`dh` is the distance rounded to 2 decimals) and returns a `NoteVectors`
+        view of them, which makes the `Note` objects when indexed. The first note has a vector of 0s.
+        """
+        if isinstance(self.notes, NoteArray):
+            x, y, ms = self.notes.x, self.notes.y, self.notes.ms
+            x32 = y32 = np.ones(len(ms), dtype=bool) # float32 columns, ints in them are exact so all math can stay float32
+        else:
+            count = len(self.notes)
+            x, y, ms = (np.fromiter((note[i] for note in self.notes), dtype=np.float64, count=count) for i in range(3))
+            x32 = np.fromiter((isinstance(note[0], np.float32) for note in self.notes), dtype=bool, count=count)
+            y32 = np.fromiter((isinstance(note[1], np.float32) for note in self.notes), dtype=bool, count=count)
+
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.ms = np.asarray(ms, dtype=np.float64) # float like the notes can be (quantum or text maps), gaps arent rounded
+        self.dx = self._column_difference(self.x, x32)
+        self.dy = self._column_difference(self.y, y32)
+        self.dt = np.abs(np.diff(self.ms, prepend=self.ms[:1]))
+
+        hyp = np.hypot(self.dx, self.dy)
+        self.dh = np.round(hyp, 2)
+
+        # np.round can land on the other side of a .xx5 than round() does, so those few go through python like before
+        scaled = hyp * 100
+        for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+            self.dh[i] = round(math.hypot(self.dx[i], self.dy[i]), 2)
+
+        return NoteVectors(self)
+
+    def _column_difference(self, column: np.ndarray, float32: np.ndarray) -> np.ndarray:
+        # |column[i] - column[i-1]|, done in float32 where either value was a np.float32 (what numpy does for the scalars)
+        difference = np.abs(np.diff(column, prepend=column[:1]))
+        pairs = float32[1:] | float32[:-1]
+        if pairs.any():
+            column32 = column.astype(np.float32)
+            difference32 = np.abs(np.diff(column32, prepend=column32[:1])).astype(np.float64)
+            difference[1:] = np.where(pairs, difference32[1:], difference[1:])
+        return difference
     
-    def last_ruleset(self, buffer, NoteData):
-        # Check if all notes in the buffer have "jumpstream" classification
-        all_spiral = all("spiral" in note.classifications for note, _ in buffer)
-        #print(all_spiral)
-        all_jumpstream = all("jumpstream" in note.classifications for note, _ in buffer)
-
-        # Apply the rules for short-slide and medium-slide
-        if all_spiral:
-            buffer_length = len(buffer)
-            
-            if buffer_length <= 3:
-                classification = "short-slide"
-                #print("short slide")
-            elif 4 <= buffer_length <= 5:
-                classification = "medium-slide"
-                #print("med slide")
-            else:
-                classification = None
-            
-            # If we determined a valid classification, update NoteData
-            if classification:
-                for note, index in buffer:
-                    # Update the note classification in both buffer and NoteData
-                    #note.classifications.append(classification)
-                    #print(index)
-                    NoteData[index].classifications.append(classification)
-
-        # Return the updated NoteData
-        return NoteData
-
-
     def detect_sequences(self, maxjumpcount=2, maxspiralcount=3):
         """
-        Detect sequences of jumpstreams and spirals in NoteData.
+        Detect sequences of jumpstreams and spirals in NoteData. <br>
+        Every rule is worked out for all notes at once. The result is kept as a bitmask per note in `classification_mask` (see `CLASSIFICATION_BITS`),
+        and each `Note.classifications` list is put together (in the same order as it always was) when that note is accessed.
         """
 
         # For anyone looking through this code. I feel terribly sorry for you.
@@ -168,77 +367,221 @@ class NoteClassifier():
         # The setup currently works (somehow)
         # If you want to try and fix it, be my guest.
 
-        NoteData = self.NoteData  # Notes and vectors
-        #print(NoteData[0].dt)  # testing
-
-        print(len(NoteData))
-
-        i = 0
-        buffer = []
-        clearbuffer = False
-        firstNoteSwitch = False
-        while len(NoteData) > i:
-            Note = None
-            Note = NoteData[i] # easier ref
-            #print(NoteData[i].dt, i)
-
-            # Reset the classifications list for the current note to avoid duplicates
-            Note.classifications = []
-
-            # Classify the note based on its 'dh' value
-            if Note.dh >= 1.4:  # if it's a jump
-                if not firstNoteSwitch:
-                    firstNoteSwitch = True
-                    #NoteData = self.first_ruleset(buffer, NoteData)
-                Note.classifications.append("jumpstream")
-                clearbuffer = True
-            elif Note.dh <= 1.4 and Note.dh > 0.1:
-                if not firstNoteSwitch:
-                    NoteData[i-1].classifications.insert(0, "spiral")
-                    #NoteData = self.first_ruleset(buffer, NoteData)
-                    firstNoteSwitch = True
-                Note.classifications.append("spiral")                
-
-            # misc values
-            if Note.x > 2 or Note.x < 0 or Note.y > 2 or Note.y < 0:
-                Note.classifications.append("offgrid")
-
-            #print(Note.x, Note.x != round(Note.x))
-            if Note.x != round(Note.x) or Note.y != round(Note.y):
-                Note.classifications.append("quantum")
-
-            if Note.dx < 0.1 and Note.dy < 0.1:
-                if Note.dt < 5: # ms
-                    if not firstNoteSwitch:
-                        NoteData[i-1].classifications.append("meganote")
-                        #NoteData = self.first_ruleset(buffer, NoteData)
-                        firstNoteSwitch = True
-
-                    Note.classifications.append("jumpstream") if "jumpstream" in NoteData[i-1].classifications else None
-                    Note.classifications.append("spiral") if "spiral" in NoteData[i-1].classifications else None
-                    Note.classifications.append("meganote")
-                else:
-                    if not firstNoteSwitch:
-                        NoteData[i-1].classifications.append("stack")
-                        #NoteData = self.first_ruleset(buffer, NoteData)
-                        firstNoteSwitch = True
-
-                    Note.classifications.append("jumpstream") if "jumpstream" in NoteData[i-1].classifications else None
-                    Note.classifications.append("spiral") if "spiral" in NoteData[i-1].classifications else None
-                    Note.classifications.append("stack") 
-            
-            # Must be last for last_ruleset
-            if clearbuffer:
-                NoteData = self.last_ruleset(buffer, NoteData)
-                buffer = []
-                clearbuffer = False
-                firstNoteSwitch = False
-            buffer.append((NoteData[i], i))
+        self._classify(only_note=len(self.dh) == 1)
+
+        self._note_cache = {} # notes made before this have no classifications yet
+        return self.NoteData
+
+    def _classify(self, triggered: bool = False, has_jump_before: bool = False, has_spiral_before: bool = False, slides_from_start: bool = True, only_note: bool = False) -> tuple:
+        # The rules of detect_sequences on this classifiers columns. The arguments are the state from notes before these ones (classify_stream):
+        # triggered: firstNoteSwitch at the first note. has_jump_before/has_spiral_before: labels of the note before, that close notes copy.
+        # slides_from_start: the notes before the first jump start a segment for the slide rule (False if it started in earlier notes)
+        # Returns the trigger mask, has_jump and has_spiral columns that the next notes need
+
+        count = len(self.dh)
+        index = np.arange(count)
+
+        jump = self.dh >= 1.4
+        spiral = (self.dh <= 1.4) & (self.dh > 0.1) & ~jump
+        close = (self.dx < 0.1) & (self.dy < 0.1) # stacks and meganotes
+        close_kind = np.where(close, np.where(self.dt < 5, self.MEGANOTE, self.STACK), 0).astype(np.uint8)
+        offgrid = (self.x > 2) | (self.x < 0) | (self.y > 2) | (self.y < 0)
+        quantum = (self.x != np.rint(self.x)) | (self.y != np.rint(self.y))
+
+        # firstNoteSwitch: the first jump/spiral/close note after each jump (and from the start) labels the note before it too.
+        # spirals put "spiral" in front of its list, close notes add their kind to the end. The first note is always close,
+        # what it adds goes to the last note (NoteData[-1]) which gets reset later, unless its the only note.
+        next_trigger = np.where(jump | spiral | close, index, count)
+        next_trigger = np.minimum.accumulate(next_trigger[::-1])[::-1]
+        starts = np.flatnonzero(jump) + 1 if triggered else np.concatenate(([0], np.flatnonzero(jump) + 1))
+        triggers = next_trigger[starts[starts < count]]
+        triggers = triggers[triggers < count]
+
+        spiral_triggers = triggers[spiral[triggers]]
+        close_triggers = triggers[~spiral[triggers] & close[triggers]]
+        inserted_spiral = np.zeros(count, dtype=bool)
+        inserted_spiral[spiral_triggers - 1] = True
+        appended_kind = np.zeros(count, dtype=np.uint8)
+        if only_note:
+            appended_kind[close_triggers] = close_kind[close_triggers]
+        else: # a trigger on the first note changes a note that isnt here (or gets reset)
+            close_triggers = close_triggers[close_triggers > 0]
+            appended_kind[close_triggers - 1] = close_kind[close_triggers]
+
+        # close notes copy jumpstream/spiral from the note before them, which can have copied it from the one before...
+        last_open = np.maximum.accumulate(np.where(~close, index, -1)) # close notes are never jumps
+        has_jump = np.where(last_open >= 0, jump[np.maximum(last_open, 0)], has_jump_before)
+        last_spiral_or_open = np.maximum.accumulate(np.where(spiral | ~close, index, -1))
+        has_spiral = np.where(last_spiral_or_open >= 0, spiral[np.maximum(last_spiral_or_open, 0)], has_spiral_before)
+
+        copied_jump = close & np.concatenate(([has_jump_before], has_jump[:-1]))
+        copied_spiral = close & (np.concatenate(([has_spiral_before], has_spiral[:-1])) | np.isin(index, spiral_triggers))
+
+        # slide rule: notes from one jump up to the next jump (or from the start) that are all spirals are slides
+        slide_kind = np.zeros(count, dtype=np.uint8)
+        jumps = np.flatnonzero(jump)
+        if len(jumps):
+            not_spiral = np.concatenate(([0], np.cumsum(~(spiral | copied_spiral | inserted_spiral))))
+            previous = np.concatenate(([0], jumps[:-1]))
+            lengths = jumps - previous
+            all_spiral = not_spiral[jumps] == not_spiral[previous]
+            kinds = np.where(all_spiral & (lengths <= 3), self.SHORT_SLIDE, np.where(all_spiral & (lengths <= 5), self.MEDIUM_SLIDE, 0))
+            if not slides_from_start:
+                kinds[0] = 0
+            slide_kind[:jumps[-1]] = np.repeat(kinds, lengths)
+
+        bits = self.CLASSIFICATION_BITS
+        mask = np.zeros(count, dtype=np.uint16)
+        mask[jump | copied_jump] |= bits["jumpstream"]
+        mask[spiral | copied_spiral | inserted_spiral] |= bits["spiral"]
+        mask[(close_kind == self.STACK) | (appended_kind == self.STACK)] |= bits["stack"]
+        mask[(close_kind == self.MEGANOTE) | (appended_kind == self.MEGANOTE)] |= bits["meganote"]
+        mask[quantum] |= bits["quantum"]
+        mask[offgrid] |= bits["offgrid"]
+        mask[slide_kind == self.SHORT_SLIDE] |= bits["short-slide"]
+        mask[slide_kind == self.MEDIUM_SLIDE] |= bits["medium-slide"]
+
+        self.classification_mask = mask
+        self._classification_parts = (inserted_spiral, jump, spiral, offgrid, quantum, copied_jump, copied_spiral, close_kind, appended_kind, slide_kind)
+
+        trigger_mask = np.zeros(count, dtype=bool)
+        trigger_mask[triggers] = True
+        return trigger_mask, has_jump, has_spiral
+
+    @classmethod
+    def classify_stream(cls, chunks, time_multiplier=5):
+        """
+        Classifies notes that come in chunks (lists of notes or `NoteArray`s in time order, like `SSPMParser.IterNotes` gives for most maps) without holding all of them. <br>
+        Yields a classified `NoteClassifier` per chunk of finished notes. Put together they give the same classifications as classifying every note at once.
+        A few notes are held back each time until the notes after them are known (at most the last 5 notes of a possible slide).
+
+        ```python
+        for classified in NoteClassifier.classify_stream(SSPMParser().IterNotes("marathon.sspm")):
+            counts.update(classified.classification_counts())
+        ```
+        """
+        state = {"triggered": False, "has_jump_before": False, "has_spiral_before": False, "slides_from_start": True}
+        before = None # last note given out, the vectors of the next notes start from it
+        pending = None # notes held back
+        first = True
+
+        for chunk in chain(chunks, [None]):
+            final = chunk is None
+            window = cls._join_notes(pending, chunk)
+            if window is None or len(window) == 0:
+                continue
+
+            joined = cls._join_notes(before, window)
+            ms = joined.ms if isinstance(joined, NoteArray) else np.fromiter((note[2] for note in joined), dtype=np.float64, count=len(joined))
+            if (np.diff(ms) < 0).any(): # the constructor would sort them, which only works when everything is there
+                raise ValueError("Notes have to come in time order to be classified as a stream")
+
+            classifier = cls(joined, time_multiplier)
+            if before is not None:
+                classifier = classifier._slice(1, len(classifier.dh))
+
+            trigger_mask, has_jump, has_spiral = classifier._classify(only_note=first and final and len(window) == 1, **state)
+            count = len(window)
+
+            if final:
+                end = count
+            else: # the last note can still get labels from the next one, and an open segment of spirals can still be a slide
+                jumps = np.flatnonzero(classifier._classification_parts[1])
+                start = jumps[-1] if len(jumps) else 0
+                inserted_spiral, _, spiral, _, _, _, copied_spiral, _, _, _ = classifier._classification_parts
+                could_slide = (len(jumps) or state["slides_from_start"]) and count - start <= 5 and (spiral | copied_spiral | inserted_spiral)[start:count - 1].all()
+                end = start if could_slide else count - 1
+
+            if end == 0:
+                pending = window
+                continue
+
+            jumps_before = np.flatnonzero(classifier._classification_parts[1][:end])
+            segment_start = jumps_before[-1] + 1 if len(jumps_before) else 0
+            state = {
+                "triggered": bool(trigger_mask[segment_start:end].any()) or (not len(jumps_before) and state["triggered"]),
+                "has_jump_before": bool(has_jump[end - 1]),
+                "has_spiral_before": bool(has_spiral[end - 1]),
+                "slides_from_start": end < count and bool(classifier._classification_parts[1][end]),
+            }
+            before = window[end - 1:end]
+            pending = window[end:]
+            first = False
+
+            yield classifier._slice(0, end)
+
+    @staticmethod
+    def _join_notes(first, second):
+        # joins two runs of notes, either can be None. NoteArrays stay NoteArrays, anything else becomes a list
+        if first is None or len(first) == 0:
+            return second
+        if second is None or len(second) == 0:
+            return first
+        if isinstance(first, NoteArray) and isinstance(second, NoteArray):
+            return NoteArray(*(np.concatenate((getattr(first, column), getattr(second, column))) for column in ("x", "y", "ms", "quantum")))
+        return list(first) + list(second)
+
+    def _slice(self, start: int, stop: int) -> "NoteClassifier":
+        # classifier over notes[start:stop] sharing these columns
+        part = object.__new__(type(self))
+        part.notes = self.notes[start:stop]
+        part.time_multiplier = self.time_multiplier
+        part.patterns = []
+        for column in ("x", "y", "ms", "dx", "dy", "dt", "dh"):
+            setattr(part, column, getattr(self, column)[start:stop])
+        part.classification_mask = self.classification_mask[start:stop] if self.classification_mask is not None else None
+        part._classification_parts = tuple(column[start:stop] for column in self._classification_parts) if self._classification_parts is not None else None
+        part._note_cache = {}
+        return part
+
+    def classifications_at(self, index: int) -> list:
+        """
+        The classifications of one note as a list, in the order they were given (can have repeats). Empty before `detect_sequences`
+        """
+        if self._classification_parts is None:
+            return []
+
+        inserted_spiral, jump, spiral, offgrid, quantum, copied_jump, copied_spiral, close_kind, appended_kind, slide_kind = (part[index] for part in self._classification_parts)
+        classifications = ["spiral"] if inserted_spiral else []
+        if jump:
+            classifications.append("jumpstream")
+        elif spiral:
+            classifications.append("spiral")
+        if offgrid:
+            classifications.append("offgrid")
+        if quantum:
+            classifications.append("quantum")
+        if copied_jump:
+            classifications.append("jumpstream")
+        if copied_spiral:
+            classifications.append("spiral")
+        if close_kind:
+            classifications.append(self.KIND_NAMES[close_kind])
+        if appended_kind:
+            classifications.append(self.KIND_NAMES[appended_kind])
+        if slide_kind:
+            classifications.append(self.KIND_NAMES[slide_kind])
+
+        return classifications
+
+    def classification_counts(self) -> dict:
+        """
+        How many times each classification was given across all notes (same as counting every `Note.classifications` list, without making the Notes)
+        """
+        if self._classification_parts is None:
+            self.detect_sequences()
 
-            i += 1
+        inserted_spiral, jump, spiral, offgrid, quantum, copied_jump, copied_spiral, close_kind, appended_kind, slide_kind = self._classification_parts
+        counts = {
+            "jumpstream": int(jump.sum() + copied_jump.sum()),
+            "spiral": int(inserted_spiral.sum() + spiral.sum() + copied_spiral.sum()),
+            "offgrid": int(offgrid.sum()),
+            "quantum": int(quantum.sum()),
+        }
+        for kind in (self.MEGANOTE, self.STACK, self.SHORT_SLIDE, self.MEDIUM_SLIDE):
+            counts[self.KIND_NAMES[kind]] = int((close_kind == kind).sum() + (appended_kind == kind).sum() + (slide_kind == kind).sum())
 
-        self.NoteData = NoteData
-        return NoteData
+        return {name: amount for name, amount in counts.items() if amount}
 
     """
     def get_pattern_prevalence(self):
@@ -352,7 +695,3 @@ if __name__ == "__main__":
 
                 # Write the blended color to the file
                 f.write(f"{color}\n")
-
-
-
-print("finished")
\ No newline at end of file
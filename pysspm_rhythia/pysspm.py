@@ -1,11 +1,32 @@
+from __future__ import annotations # annotations like np.ndarray are never evaluated, so they dont import numpy
+
+from collections.abc import MutableMapping
+from functools import partial
 from io import BytesIO
 from hashlib import sha1
+from itertools import chain
+import os
+from mmap import mmap, ACCESS_READ
+from shutil import copymode
+from struct import pack, unpack_from, calcsize
+from tempfile import NamedTemporaryFile
+from time import perf_counter
 from types import NoneType
-from typing import BinaryIO
-import numpy as np
+from typing import BinaryIO, TextIO
 from warnings import warn
 
 
+class _LazyNumpy:
+    # Stands in for numpy until it is first used. Header, metadata and strings are read/written with plain ints and
+    # struct, so only decoding/encoding notes imports numpy (slow on cold starts for scripts that only scan metadata)
+    def __getattr__(self, name):
+        import numpy
+        globals()["np"] = numpy # every use after this goes straight to numpy
+        return getattr(numpy, name)
+
+np = _LazyNumpy()
+
+
 # TODO: (In order of priority)
 # Add typing support for library ✔️
 # add proper documentation on github
@@ -34,6 +55,321 @@ Stolen from the SSQE version lol
             return data.ToArray();
 """
 
+class NoteArray:
+    """
+    # Note Array
+
+    ### Columnar storage for notes. Alternative to the list of tuples in `SSPMParser.Notes`
+
+    Stores x/y as float32, ms as uint32 and a bool mask of quantum notes (13 bytes per note instead of a tuple of 3 python objects). <br>
+    Acts like the list form when read: indexing gives `(x, y, ms)` tuples, slicing gives a `NoteArray` view that shares memory with this one.
+
+    ```python
+    parser.ReadSSPM("*.sspm", columnar=True)
+    first_notes = parser.Notes[0:100] # no copy
+    x, y, ms = parser.Notes.x, parser.Notes.y, parser.Notes.ms # raw columns
+    ```
+    """
+
+    __slots__ = ("x", "y", "ms", "quantum")
+    CHUNK_SIZE = 65536 # notes converted to tuples at a time when iterating
+
+    def __init__(self, x, y, ms, quantum=None):
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.ms = np.asarray(ms, dtype=np.uint32)
+
+        if quantum is None: # anything not sitting on a whole number is quantum
+            quantum = (self.x != np.rint(self.x)) | (self.y != np.rint(self.y))
+        self.quantum = np.asarray(quantum, dtype=bool)
+
+        if not (len(self.x) == len(self.y) == len(self.ms) == len(self.quantum)):
+            raise ValueError("x, y, ms and quantum columns must all be the same length")
+
+    @classmethod
+    def from_notes(cls, notes) -> "NoteArray":
+        """
+        Creates a NoteArray from the list form `[(x, y, ms), ...]`. Notes with non integer x or y are stored as quantum
+        """
+        if isinstance(notes, NoteArray):
+            return notes
+
+        count = len(notes)
+        columns = np.array(notes, dtype=np.float64).reshape(count, 3)
+        quantum = np.fromiter((not (isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer))) for x, y, _ in notes), dtype=bool, count=count)
+
+        return cls(columns[:, 0], columns[:, 1], columns[:, 2], quantum)
+
+    @property
+    def nbytes(self) -> int:
+        return self.x.nbytes + self.y.nbytes + self.ms.nbytes + self.quantum.nbytes
+
+    def sorted(self) -> "NoteArray":
+        """
+        Returns a copy sorted by time. Stable, so notes on the same ms keep their order
+        """
+        order = np.argsort(self.ms, kind="stable")
+        return NoteArray(self.x[order], self.y[order], self.ms[order], self.quantum[order])
+
+    def tolist(self) -> list:
+        """
+        Converts back into the list form. Grid notes get python ints for x/y, quantum notes np.float32 and ms np.uint32
+        """
+        x_f = np.empty(len(self), dtype=object)
+        y_f = np.empty(len(self), dtype=object)
+        grid = ~self.quantum
+        x_f[grid] = self.x[grid].astype(np.int64).tolist()
+        y_f[grid] = self.y[grid].astype(np.int64).tolist()
+        x_f[self.quantum] = list(self.x[self.quantum])
+        y_f[self.quantum] = list(self.y[self.quantum])
+
+        return list(zip(x_f.tolist(), y_f.tolist(), list(self.ms)))
+
+    def __len__(self) -> int:
+        return len(self.ms)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if self.quantum[index]:
+                return (self.x[index], self.y[index], self.ms[index])
+            return (int(self.x[index]), int(self.y[index]), self.ms[index])
+
+        # slices are views, masks/index arrays are copies (numpy rules)
+        return NoteArray(self.x[index], self.y[index], self.ms[index], self.quantum[index])
+
+    def __iter__(self):
+        for start in range(0, len(self), self.CHUNK_SIZE):
+            yield from self[start:start + self.CHUNK_SIZE].tolist()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, NoteArray):
+            return len(self) == len(other) and bool((self.x == other.x).all() and (self.y == other.y).all() and (self.ms == other.ms).all())
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"NoteArray({len(self)} notes, quantum={int(self.quantum.sum())})"
+
+
+class SSPMStats:
+    """
+    # SSPM Stats
+
+    ### Wall time and bytes for every phase of reading/writing a map, plus how many notes were decoded/encoded
+
+    Pass one in as `stats=` to `ReadSSPM`, `WriteSSPM` or `VerifySSPM`. Reusing the same object adds up the phases over many maps.
+    `callback(phase, seconds, nbytes)` is called as each phase finishes, for sending it to a logger or metrics system.
+
+    ```python
+    stats = SSPMStats()
+    parser.ReadSSPM("*.sspm", stats=stats)
+    stats.phases # {"load": {"seconds": ..., "bytes": ...}, "header": {...}, "strings": {...}, "audio": {...}, ...}
+    ```
+
+    Read phases: load, header, strings, custom_data, audio, cover, marker_definitions, markers. <br>
+    Write phases: header, strings, markers, marker_definitions, hashing, assembly. VerifySSPM: header, hashing.
+    """
+
+    __slots__ = ("phases", "notes_decoded", "notes_encoded", "callback", "_last")
+
+    def __init__(self, callback=None):
+        self.phases = {} # phase: {"seconds": float, "bytes": int}
+        self.notes_decoded = 0
+        self.notes_encoded = 0
+        self.callback = callback
+        self._last = None
+
+    def start(self) -> None:
+        """
+        Marks the start of the first phase
+        """
+        self._last = perf_counter()
+
+    def lap(self, phase: str, nbytes: int = 0) -> None:
+        """
+        Ends `phase`. Its time is everything since the last `start`/`lap`
+        """
+        now = perf_counter()
+        seconds = now - self._last if self._last is not None else 0.0
+        self._last = now
+
+        totals = self.phases.setdefault(phase, {"seconds": 0.0, "bytes": 0})
+        totals["seconds"] += seconds
+        totals["bytes"] += int(nbytes)
+        if self.callback is not None:
+            self.callback(phase, seconds, int(nbytes))
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(totals["seconds"] for totals in self.phases.values())
+
+    def as_dict(self) -> dict:
+        return {"phases": {phase: dict(totals) for phase, totals in self.phases.items()}, "notes_decoded": self.notes_decoded, "notes_encoded": self.notes_encoded}
+
+    def __repr__(self) -> str:
+        slowest = max(self.phases, key=lambda phase: self.phases[phase]["seconds"]) if self.phases else None
+        return f"SSPMStats({len(self.phases)} phases, {self.total_seconds:.4f}s, slowest={slowest})"
+
+
+class CustomValues(MutableMapping):
+    """
+    # Custom Values
+
+    ### The custom data block of a V2 map as `{field name: value}`, with the SSPM type of every field in `types`
+
+    | type | value | | type | value |
+    |---|---|---|---|---|
+    | 0x00 | None | | 0x07 | position `(x, y)`, ints on the grid or floats |
+    | 0x01 | u8 int | | 0x08 | buffer (u16 length) |
+    | 0x02 | u16 int | | 0x09 | string (u16 length) |
+    | 0x03 | u32 int | | 0x0a | long buffer (u32 length) |
+    | 0x04 | u64 int | | 0x0b | long string (u32 length) |
+    | 0x05 | f32 float | | 0x0c | array `(0x0c, item type)`, a list |
+    | 0x06 | f64 float | | | |
+
+    When a map is read from a path with `memory_map=True`, values bigger than `SSPMParser.CUSTOM_LAZY_SIZE` are skipped while
+    reading and only read and decoded the first time they are used. <br>
+    New fields get a type from their value (str: string, bytes: buffer, int: u32/u64, float: f64, bool: u8, (x, y): position,
+    list: array, None: 0x00). Replacing an existing field keeps its type, `set(name, value, type)` picks one explicitly.
+
+    ```python
+    parser.custom_values["difficulty_name"] = "Insane"
+    parser.custom_values.set("rating", 4, 0x01) # stored as u8
+    ```
+    """
+
+    FIXED_TYPES = {0x01: "<B", 0x02: "<H", 0x03: "<I", 0x04: "<Q", 0x05: "<f", 0x06: "<d"} # type: struct format
+    LENGTH_TYPES = {0x08: "<H", 0x09: "<H", 0x0a: "<I", 0x0b: "<I"} # type: struct format of the length before the data
+    STRING_TYPES = (0x09, 0x0b)
+    POSITION, ARRAY = 0x07, 0x0c
+
+    def __init__(self, values: dict = None):
+        self.types = {} # name: type id, or (0x0c, item type) for arrays
+        self._values = {}
+        self._pending = {} # name: function that reads the value, for values not read from the file yet
+        for name, value in (values or {}).items():
+            self[name] = value
+
+    def set(self, name: str, value, type_id: int | tuple = None) -> None:
+        if type_id is None:
+            type_id = self.types[name] if name in self.types else self.type_of(value)
+        self.types[name] = type_id
+        self._values[name] = value
+        self._pending.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        """
+        False for fields that are still only in the file
+        """
+        return name not in self._pending
+
+    def __setitem__(self, name: str, value) -> None:
+        self.set(name, value)
+
+    def __getitem__(self, name: str):
+        if name in self._pending:
+            self._values[name] = self._pending.pop(name)()
+        return self._values[name]
+
+    def __delitem__(self, name: str) -> None:
+        del self.types[name]
+        self._values.pop(name, None)
+        self._pending.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __repr__(self) -> str:
+        return f"CustomValues({ {name: self._values[name] if self.is_loaded(name) else '<not loaded>' for name in self.types} })"
+
+    @classmethod
+    def type_of(cls, value) -> int | tuple:
+        """
+        Type id a value is stored as when it has none yet
+        """
+        if value is None:
+            return 0x00
+        if isinstance(value, bool):
+            return 0x01
+        if isinstance(value, int):
+            if value < 0:
+                raise ValueError("Custom data ints are unsigned. FOUND:", value)
+            return 0x03 if value <= 0xFFFFFFFF else 0x04
+        if isinstance(value, float):
+            return 0x06
+        if isinstance(value, str):
+            return 0x09 if len(value.encode("UTF-8")) <= 0xFFFF else 0x0b
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return 0x08 if len(value) <= 0xFFFF else 0x0a
+        if isinstance(value, tuple) and len(value) == 2:
+            return cls.POSITION
+        if isinstance(value, list):
+            return (cls.ARRAY, cls.type_of(value[0]) if value else 0x01)
+        raise TypeError("No custom data type for", type(value))
+
+    @classmethod
+    def encode(cls, type_id: int | tuple, value) -> bytes:
+        """
+        Bytes of a value as stored after its type id
+        """
+        type_id, item_type = type_id if isinstance(type_id, tuple) else (type_id, None)
+
+        if type_id == 0x00:
+            return b""
+        if type_id in cls.FIXED_TYPES:
+            return pack(cls.FIXED_TYPES[type_id], value)
+        if type_id == cls.POSITION:
+            x, y = value
+            if isinstance(x, int) and isinstance(y, int) and 0 <= x <= 0xFF and 0 <= y <= 0xFF:
+                return bytes((0x00, x, y))
+            return b"\x01" + pack("<ff", x, y)
+        if type_id in cls.LENGTH_TYPES:
+            data = value.encode("UTF-8") if type_id in cls.STRING_TYPES else bytes(value)
+            return pack(cls.LENGTH_TYPES[type_id], len(data)) + data
+        if type_id == cls.ARRAY:
+            item_type = item_type if item_type is not None else cls.type_of(value)[1]
+            items = b"".join(cls.encode(item_type, item) for item in value)
+            return bytes((item_type[0] if isinstance(item_type, tuple) else item_type,)) + pack("<I", len(items)) + items
+        raise ValueError("Unknown custom data type:", type_id)
+
+    @classmethod
+    def decode(cls, type_id: int, data: bytes | memoryview, position: int = 0) -> tuple:
+        """
+        Decodes the value starting at `position`. Returns `(value, position after it)`. Buffers read from a memoryview stay views
+        """
+        if type_id == 0x00:
+            return None, position
+        if type_id in cls.FIXED_TYPES:
+            return unpack_from(cls.FIXED_TYPES[type_id], data, position)[0], position + calcsize(cls.FIXED_TYPES[type_id])
+        if type_id == cls.POSITION:
+            if data[position] == 0x00:
+                return (data[position + 1], data[position + 2]), position + 3
+            return unpack_from("<ff", data, position + 1), position + 9
+        if type_id in cls.LENGTH_TYPES:
+            prefix = calcsize(cls.LENGTH_TYPES[type_id])
+            length = unpack_from(cls.LENGTH_TYPES[type_id], data, position)[0]
+            value = data[position + prefix:position + prefix + length]
+            if len(value) < length:
+                raise ValueError("Custom data value ended early")
+            return (bytes(value).decode("UTF-8") if type_id in cls.STRING_TYPES else value), position + prefix + length
+        if type_id == cls.ARRAY:
+            item_type, length = data[position], unpack_from("<I", data, position + 1)[0]
+            end = position + 5 + length
+            if item_type == 0x00 and length:
+                raise ValueError("Custom data array of empty values cant have a length")
+            items, position = [], position + 5
+            while position < end:
+                item, position = cls.decode(item_type, data, position)
+                items.append(item)
+            return items, end
+        raise ValueError("Unknown custom data type:", type_id)
+
+
 class SSPMParser:
     """
     # SSPM Reader
@@ -49,6 +385,9 @@ class SSPMParser:
     HEADER_SIGNATURE = b'SS+m'
     DEFAULT_VERSION = b'\x02\x00'
     RESERVED_SPACE_V2 = b'\x00\x00\x00\x00'
+    METADATA_READ_SIZE = 512 # bytes read at a time from disk when only reading metadata
+    VERIFY_CHUNK_SIZE = 1024 * 1024 # bytes hashed at a time in VerifySSPM
+    CUSTOM_LAZY_SIZE = 64 * 1024 # custom data values bigger than this are skipped while reading and read when first used
     
     DIFFICULTIES = { 
         "N/A": 0x00,
@@ -79,13 +418,16 @@ class SSPMParser:
         self.Notes = None
         self.map_ID = None
         self.custom_data_offset = 0
+        self.audio_ID = None
+        self.custom_values = CustomValues()
+        self.custom_fields = {} # name: (type id, offset, length) of every custom value in the file read last
 
     def _GetNextVariableString(self, data: BinaryIO, fourbytes: bool = False, encoding: str = "ASCII", V2: bool = True) -> str: # Why did this have a self variable??
         # Read 2 bytes for length (assuming little-endian format)
         length_bytes = data.read(2 if V2 else 1)
         
         # Convert the length bytes to an integer | Bugfix reading improper data
-        length_f = np.int32(int.from_bytes(length_bytes, byteorder='little')) if fourbytes else np.int16(int.from_bytes(length_bytes, byteorder='little'))
+        length_f = int.from_bytes(length_bytes, byteorder='little')
         
         # Read the string of the determined length
         final_string = data.read(length_f)
@@ -103,11 +445,191 @@ class SSPMParser:
         
         return final_string.decode(encoding=encoding)
 
-    
-    def WriteSSPM(self, filename: str = None, forcemapid=False, debug: bool = False, **kwargs) -> bytearray | NoneType:
+    def _ReadBlob(self, data: BinaryIO, length: int) -> bytes | memoryview:
+        """
+        Reads `length` bytes. Memory mapped files give back a memoryview slice into the map instead of a copy
+        """
+        if not isinstance(data, mmap):
+            return data.read(length)
+
+        start = data.tell()
+        end = min(start + int(length), len(data))
+        data.seek(end)
+        return memoryview(data)[start:end]
+
+    def _DecodeMarkers(self, marker_data: bytes, note_count: int, V2: bool = True) -> tuple:
+        """
+        Bulk decodes a block of note markers into numpy arrays instead of reading them one at a time. <br>
+        Markers are variable length (`ms, [markerType], identifier, x, y`): 8/14 bytes in V2 and 7/13 bytes in V1
+        depending on if the note is on the grid or quantum.
+
+        Returns `(x, y, ms, quantum)` arrays in file order. x/y are float32, ms is uint32 and quantum is a bool mask.
+        """
+        prefix = 6 if V2 else 5 # bytes before x/y | ms(4) + markerType(1) + identifier(1) in V2
+        grid_size = prefix + 2 # x, y as 1 byte each
+        quantum_size = prefix + 8 # x, y as float32
+
+        buf = np.frombuffer(marker_data, dtype=np.uint8)
+        length = len(buf)
+
+        if note_count == 0:
+            return np.empty(0, np.float32), np.empty(0, np.float32), np.empty(0, np.uint32), np.empty(0, bool)
+
+        # Fast paths. The whole block is one record type so it can be viewed directly
+        for size, quantum in ((grid_size, False), (quantum_size, True)):
+            if length < note_count * size:
+                continue
+            records = buf[:note_count * size].reshape(note_count, size)
+            identifiers = records[:, prefix - 1]
+            if not (identifiers.all() if quantum else not identifiers.any()):
+                continue
+
+            ms = records[:, 0:4].copy().view('<u4').ravel().astype(np.uint32)
+            if quantum:
+                x = records[:, prefix:prefix + 4].copy().view('<f4').ravel().astype(np.float32)
+                y = records[:, prefix + 4:prefix + 8].copy().view('<f4').ravel().astype(np.float32)
+            else:
+                x = records[:, prefix].astype(np.float32)
+                y = records[:, prefix + 1].astype(np.float32)
+            return x, y, ms, np.full(note_count, quantum)
+
+        # Mixed block. A record's size depends on its own identifier byte, so the starts are walked a block of notes at a time:
+        # every byte the block can reach gets the position of the record that would follow it, then pointer doubling
+        # finds the block's record starts in log2(block) passes. Memory stays at a few bytes per byte of one block.
+        starts = np.empty(note_count, dtype=np.int64)
+        position = 0
+        for first in range(0, note_count, 65536):
+            count = min(65536, note_count - first)
+            window = buf[position:position + count * quantum_size]
+            following = np.full(len(window) + 1, len(window), dtype=np.int32) # last slot is a sentinel for "past the end"
+            identifiers = window[prefix - 1:]
+            following[:len(identifiers)] = np.arange(len(identifiers), dtype=np.int32) + np.where(identifiers == 0, grid_size, quantum_size).astype(np.int32)
+            np.minimum(following, len(window), out=following)
+
+            block_starts = np.zeros(count, dtype=np.int32)
+            jump = following
+            filled = 1
+            while filled < count:
+                take = min(filled, count - filled)
+                block_starts[filled:filled + take] = jump[block_starts[:take]]
+                filled += take
+                if filled < count:
+                    jump = jump[jump]
+
+            last = position + int(block_starts[-1])
+            if block_starts[-1] >= len(window) or last + prefix > length:
+                raise ValueError("Marker data ended before all notes were read. Expected notes:", note_count)
+            starts[first:first + count] = block_starts + position
+            position = last + (quantum_size if buf[last + prefix - 1] else grid_size)
+
+        if position > length:
+            raise ValueError("Marker data ended before all notes were read. Expected notes:", note_count)
+
+        quantum = buf[starts + (prefix - 1)] != 0
+
+        # ms/x/y are gathered through views that read a value at every byte offset, so no index matrices are built
+        ms = self._ByteOffsetView(buf, '<u4')[starts].astype(np.uint32)
+        x = buf[starts + prefix].astype(np.float32)
+        y = buf[starts + prefix + 1].astype(np.float32)
+        quantum_starts = starts[quantum] + prefix
+        if len(quantum_starts):
+            floats = self._ByteOffsetView(buf, '<f4')
+            x[quantum] = floats[quantum_starts]
+            y[quantum] = floats[quantum_starts + 4]
+
+        return x, y, ms, quantum
+
+    @staticmethod
+    def _ByteOffsetView(buf: np.ndarray, dtype: str) -> np.ndarray:
+        # overlapping view of a uint8 buffer: element i is the `dtype` value starting at byte i
+        dtype = np.dtype(dtype)
+        return np.ndarray((max(len(buf) - dtype.itemsize + 1, 0),), dtype=dtype, buffer=buf, strides=(1,))
+
+    def _BuildNotes(self, x: np.ndarray, y: np.ndarray, ms: np.ndarray, quantum: np.ndarray, columnar: bool = False) -> list | NoteArray:
+        """
+        Turns decoded marker arrays into `Notes` sorted by time. <br>
+        Either the list form (same types as reading one by one) or a `NoteArray` if `columnar` is set
+        """
+        notes = NoteArray(x, y, ms, quantum).sorted()
+        return notes if columnar else notes.tolist()
+
+    def _EncodeMarkers(self, notes, export_offset: int = 0) -> tuple:
+        """
+        Bulk encodes notes into the V2 marker block. Byte for byte the same as encoding one note at a time. <br>
+        A note is written on the grid (8 bytes) if `round(x) == round(x, 2)` for both x and y, otherwise as quantum (14 bytes).
+
+        Returns `(marker_bytes, last_ms)`
+        """
+        count = len(notes)
+        if count == 0:
+            return b'', 0
+
+        if isinstance(notes, NoteArray):
+            x, y, ms = notes.x.astype(np.float64), notes.y.astype(np.float64), notes.ms.astype(np.float64)
+        else:
+            columns = np.fromiter(chain.from_iterable(notes), dtype=np.float64, count=count * 3).reshape(count, 3)
+            x, y, ms = columns[:, 0], columns[:, 1], columns[:, 2]
+
+        # Grid check. Python's round(v, 2) differs from numpy (and between float and np.float32) right on the
+        # 0.005 boundary, so notes close to it get checked one by one the same way as before.
+        grid = np.ones(count, dtype=bool)
+        unsure = np.zeros(count, dtype=bool)
+        for values in (x, y):
+            distance = np.abs(values - np.rint(values))
+            band = 1e-4 * np.maximum(1.0, np.abs(values))
+            grid &= distance < 0.005 - band
+            unsure |= ~(distance < 0.005 - band) & ~(distance > 0.005 + band) # NaNs end up here too
+        del distance, band
+        for i in np.flatnonzero(unsure):
+            nx, ny, _ = notes[i]
+            grid[i] = round(nx) == round(nx, 2) and round(ny) == round(ny, 2)
+
+        ms_f = ms.astype(np.int64) + export_offset
+        if ms_f.min() < 0 or ms_f.max() > 0xFFFFFFFF:
+            raise OverflowError("Note ms (+ export_offset) does not fit in an unsigned 32 bit int")
+        grid_x, grid_y = np.rint(x[grid]), np.rint(y[grid])
+        if len(grid_x) and (min(grid_x.min(), grid_y.min()) < 0 or max(grid_x.max(), grid_y.max()) > 0xFFFF):
+            raise OverflowError("Grid note x/y must be between 0 and 65535")
+
+        grid_markers = np.zeros(int(grid.sum()), dtype=[('ms', '<u4'), ('marker_type', 'u1'), ('identifier', 'u1'), ('x', 'u1'), ('y', 'u1')])
+        grid_markers['ms'] = ms_f[grid]
+        grid_markers['x'] = grid_x.astype(np.int64) & 0xFF # only the low byte is kept
+        grid_markers['y'] = grid_y.astype(np.int64) & 0xFF
+
+        quantum = ~grid
+        quantum_markers = np.zeros(int(quantum.sum()), dtype=[('ms', '<u4'), ('marker_type', 'u1'), ('identifier', 'u1'), ('x', '<f4'), ('y', '<f4')])
+        quantum_markers['ms'] = ms_f[quantum]
+        quantum_markers['identifier'] = 1
+        quantum_markers['x'] = x[quantum]
+        quantum_markers['y'] = y[quantum]
+
+        last_ms = max(0, int(ms.max()))
+
+        if not len(quantum_markers):
+            return grid_markers.tobytes(), last_ms
+        if not len(grid_markers):
+            return quantum_markers.tobytes(), last_ms
+
+        # Interleave both record sizes back into note order. One mask over the output bytes marks the grid records,
+        # both kinds are in note order so each fills its part of the mask in one go.
+        # The float columns arent needed anymore, freeing them first keeps them from adding to the peak
+        del x, y, ms, ms_f, grid_x, grid_y
+        in_grid = np.repeat(grid, np.where(grid, np.uint8(grid_markers.itemsize), np.uint8(quantum_markers.itemsize)))
+        markers = np.empty(len(in_grid), dtype=np.uint8)
+        markers[in_grid] = grid_markers.view(np.uint8)
+        np.logical_not(in_grid, out=in_grid)
+        markers[in_grid] = quantum_markers.view(np.uint8)
+        del in_grid, grid_markers, quantum_markers
+
+        return markers.tobytes(), last_ms
+
+
+    def WriteSSPM(self, filename: str | BinaryIO = None, forcemapid=False, debug: bool = False, stats: SSPMStats = None, **kwargs) -> bytearray | NoneType:
         """
         Creates a SSPM v2 file based on variables passed in, or already set. <br>
-        If no filepath is passed in, it will return file as bytes
+        If no filepath is passed in, it will return file as bytes. <br>
+        `filename` can also be an open binary file (or anything with `.write`). Sections are written to it one at a time
+        instead of building the whole file in memory first
         <br>
         Variables that need to be covered:
         1. `coverBytes`: Cover image in bytes form, or None
@@ -117,6 +639,7 @@ class SSPMParser:
         5. `mappers`: a list of strings containing the mapper(s)
         6. `notes`: a list of tuples as shown below
         7. `forcemapid`: if enabled, overwrite mapId to be added instead | otherwise defaults to mappers + map name | make sure its only ASCII characters
+        8. `stats`: an `SSPMStats` to record the time and bytes of every phase in. Nothing is timed without it
         ```python
         # (x, y, ms)
         self.notes = [
@@ -140,6 +663,9 @@ class SSPMParser:
             f.write(sspm.WriteSSPM())
         ```
         """
+        if stats is not None:
+            stats.start()
+
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
@@ -159,8 +685,8 @@ class SSPMParser:
         self.requires_mod = b"\x01" if self.requires_mod == 1 or self.requires_mod == b"\x01" else b"\x00" # Who actually uses this though?
         
         #print(self.Notes[-1][2])
-        self.last_ms = np.uint32(self.Notes[-1][2]).tobytes()  # np.uint32 object thus far | 4 bytes | base before getting proper one
-        self.note_count = np.uint32(len(self.Notes)).tobytes() # bytes should be length of 4
+        self.last_ms = pack("<I", int(self.Notes[-1][2])) # 4 bytes | base before getting proper one
+        self.note_count = pack("<I", len(self.Notes)) # bytes should be length of 4
         self.marker_count = self.note_count # nothing changed from last time
 
         self.Difficulty = self.Difficulty if self.DIFFICULTIES.get(self.Difficulty) == None else self.DIFFICULTIES.get(self.Difficulty)
@@ -168,20 +694,21 @@ class SSPMParser:
 
         if debug:
             print("Metadata loaded")
+        if stats is not None:
+            stats.lap("header", 128) # signature, hash, metadata and pointers are always 128 bytes
 
         # good until here
-        #self.mapID = 
-        self.song_name = "sspmLib Song - author".encode("ASCII") if not self.song_name else self.song_name.encode("ASCII")
+        # encoded copies are kept local so the parser keeps its strings and can be written again
+        song_name = self._AsASCII(self.song_name) if self.song_name else "sspmLib Song - author".encode("ASCII")
+        map_name = self._AsASCII(self.map_name)
 
         if not forcemapid:
-            self.map_ID = f"{'_'.join(self.mappers)}_{self.map_name.replace(' ', '_')}".encode("ASCII") # combines mappers and map name to get the id.
-        else:
-            self.map_ID = self.map_ID.encode("ASCII")
-            
-        self.map_ID_f = len(self.map_ID).to_bytes(2, 'little')
-        self.map_name = self.map_name.encode("ASCII")
-        self.map_name_f = len(self.map_name).to_bytes(2, 'little')
-        self.song_name_f = len(self.song_name).to_bytes(2, 'little')
+            self.map_ID = f"{'_'.join(self.mappers)}_{map_name.decode('ASCII').replace(' ', '_')}" # combines mappers and map name to get the id.
+        map_ID = self._AsASCII(self.map_ID)
+
+        self.map_ID_f = len(map_ID).to_bytes(2, 'little')
+        self.map_name_f = len(map_name).to_bytes(2, 'little')
+        self.song_name_f = len(song_name).to_bytes(2, 'little')
 
         self.mapper_count_f = len(self.mappers).to_bytes(2, 'little')
         #self.mappersf = '\n'.join(self.mappers).encode('ASCII') # Possible bug | maybe include breakchar like \n
@@ -204,13 +731,15 @@ class SSPMParser:
         # Store the result in the instance variable
         self.mappers_f = bytes(mappers_f)
 
-        self.strings = self.map_ID_f+self.map_ID+self.map_name_f+self.map_name+self.song_name_f+self.song_name+self.mapper_count_f+self.mappers_f # merge values into a string because we are done with this section
+        self.strings = self.map_ID_f+map_ID+self.map_name_f+map_name+self.song_name_f+song_name+self.mapper_count_f+self.mappers_f # merge values into a string because we are done with this section
         if debug:
             print("Strings loaded")
+        if stats is not None:
+            stats.lap("strings", len(self.strings))
 
-        self.custom_data = b"\x00\x00" # 2 bytes, no custom data supported right neoww
-
-        # FEATURE REQUEST: Add support for custom difficulty here.
+        self.custom_data = self._EncodeCustomData(self.custom_values if self.custom_values is not None else {}) # 2 bytes (0 fields) when empty
+        if stats is not None:
+            stats.lap("custom_data", len(self.custom_data))
 
         # Pointer locations in byte array
 
@@ -253,41 +782,12 @@ class SSPMParser:
             # Add to the markers list
             self.Markers += finalMarker"""
 
-        count = 0
-        total_notes = len(self.Notes)
-        
-        markers = bytearray()
-        last_ms = 0
-        
-        for nx, ny, nms in self.Notes:
-            count += 1
-            
-            if debug and count % 1000 == 0:
-                print(f"Notes completed: {count}/{total_notes}", end="\r", flush=True)
-            
-            rounded_nx = round(nx)
-            rounded_ny = round(ny)
-            rounded_nx_2 = round(nx, 2)
-            rounded_ny_2 = round(ny, 2)
-            
-            # Calculate the bytes
-            ms_bytes = np.uint32(nms + self.export_offset).tobytes()
-            marker_type = b'\x00'
-            identifier = b'\x00' if (rounded_nx == rounded_nx_2 and rounded_ny == rounded_ny_2) else b'\x01'
-            
-            if identifier == b'\x00':
-                x_bytes = np.uint16(rounded_nx).tobytes()[0:1]
-                y_bytes = np.uint16(rounded_ny).tobytes()[0:1]
-            else:
-                x_bytes = np.float32(nx).tobytes()
-                y_bytes = np.float32(ny).tobytes()
-            if last_ms < nms:
-                last_ms = nms
-            
-            final_marker = ms_bytes + marker_type + identifier + x_bytes + y_bytes
-            markers.extend(final_marker)
+        markers, last_ms = self._EncodeMarkers(self.Notes, self.export_offset)
+        if stats is not None:
+            stats.notes_encoded += len(self.Notes)
+            stats.lap("markers", len(markers))
         
-        self.last_ms = np.uint32(last_ms).tobytes() # because list is not in order.
+        self.last_ms = pack("<I", last_ms) # because list is not in order.
 
         if debug:
             print("All pointers finished")
@@ -297,20 +797,20 @@ class SSPMParser:
         metadata = self.last_ms + self.note_count + self.marker_count + self.Difficulty + b"\x00\x00" + self.contains_audio + self.contains_cover + self.requires_mod # level rating Not fully implemented yet 
         offset = len(self.Header) + 20 + len(metadata) + 80 + len(self.strings)
         # pointers
-        self.custom_data_offset = np.uint64(offset).tobytes()
-        self.custom_data_length = np.uint64(len(self.custom_data)).tobytes()
+        self.custom_data_offset = pack("<Q", offset)
+        self.custom_data_length = pack("<Q", len(self.custom_data))
         offset+= len(self.custom_data)
 
         
-        self.audio_offset = np.uint64(offset).tobytes()
-        self.audio_length = np.uint64(len(self.audio_bytes)).tobytes() if self.contains_audio == b'\x01' else b'\x00\x00\x00\x00\x00\x00\x00\x00' # 8 bytes filler if no audio length found | Possible bug if no audio found, and reading special block fails. | may default to start of file.
-        offset+= len(self.audio_bytes) if self.contains_audio == b'\x01' else len(b'\x00\x00\x00\x00\x00\x00\x00\x00') # 8
-        self.audio_bytes = b'' if self.audio_bytes == None else self.audio_bytes
+        self.audio_offset = pack("<Q", offset)
+        self.audio_length = pack("<Q", len(self.audio_bytes)) if self.contains_audio == b'\x01' else b'\x00\x00\x00\x00\x00\x00\x00\x00' # 8 bytes filler if no audio length found | Possible bug if no audio found, and reading special block fails. | may default to start of file.
+        offset+= len(self.audio_bytes) if self.contains_audio == b'\x01' else 0 # nothing written if no audio
+        audio_bytes = b'' if self.audio_bytes is None else self.audio_bytes # self.audio_bytes stays None so writing again still has no audio
 
-        self.cover_offset = np.uint64(offset).tobytes()
-        self.cover_length = np.uint64(len(self.cover_bytes)).tobytes() if self.contains_cover == b'\x01' else b'\x00\x00\x00\x00\x00\x00\x00\x00' # 8 bytes filler if no audio length found 
-        offset+= len(self.cover_bytes) if self.contains_cover == b'\x01' else len(b'\x00\x00\x00\x00\x00\x00\x00\x00') # 8
-        self.cover_bytes = b'' if self.cover_bytes == None else self.cover_bytes
+        self.cover_offset = pack("<Q", offset)
+        self.cover_length = pack("<Q", len(self.cover_bytes)) if self.contains_cover == b'\x01' else b'\x00\x00\x00\x00\x00\x00\x00\x00' # 8 bytes filler if no audio length found 
+        offset+= len(self.cover_bytes) if self.contains_cover == b'\x01' else 0
+        cover_bytes = b'' if self.cover_bytes is None else self.cover_bytes
 
         self.note_definition = "ssp_note".encode("ASCII")
         self.note_definition_f = len(self.note_definition).to_bytes(2, 'little') + self.note_definition
@@ -318,18 +818,24 @@ class SSPMParser:
         self.marker_def_end = b"\x01\x07\x00" # var markerDefEnd = new byte[] { 0x01, /* one value */ 0x07, /* data type 07 - note */ 0x00 /* end of definition */ };
 
         self.marker_definitions = self.marker_def_start+self.note_definition_f+self.marker_def_end
-        self.marker_definitions_offset = np.uint64(offset).tobytes()
-        self.marker_definitions_length = np.uint64(len(self.marker_definitions)).tobytes()
+        self.marker_definitions_offset = pack("<Q", offset)
+        self.marker_definitions_length = pack("<Q", len(self.marker_definitions))
         offset+=len(self.marker_definitions)
 
+        if stats is not None:
+            stats.lap("marker_definitions", len(self.marker_definitions))
+
         # notes n stuff
         self.Markers = markers
-        self.marker_offset = np.uint64(offset).tobytes()
-        self.marker_length = np.uint64(len(self.Markers)).tobytes()
+        self.marker_offset = pack("<Q", offset)
+        self.marker_length = pack("<Q", len(self.Markers))
 
-        # hashing
-        self.marker_set = self.marker_definitions+self.Markers
-        s_hash = sha1(self.marker_set).digest()
+        # hashing | same as sha1(marker_definitions + Markers) without joining them
+        s_hash = sha1(self.marker_definitions)
+        s_hash.update(self.Markers)
+        s_hash = s_hash.digest()
+        if stats is not None:
+            stats.lap("hashing", len(self.marker_definitions) + len(self.Markers))
 
         pointers = b''
         pointers+=self.custom_data_offset+self.custom_data_length+self.audio_offset+self.audio_length+self.cover_offset+self.cover_length+self.marker_definitions_offset+self.marker_definitions_length+self.marker_offset+self.marker_length
@@ -340,26 +846,308 @@ class SSPMParser:
             print(pointers)
             print(self.strings)
             print(self.custom_data)
-            print(self.audio_bytes[0:10])
-            print(self.cover_bytes[0:10])
+            print(audio_bytes[0:10])
+            print(cover_bytes[0:10])
 
-        self.SSPMData = self.Header+s_hash+metadata+pointers+self.strings+self.custom_data+self.audio_bytes+self.cover_bytes+self.marker_definitions+self.Markers
-        
-        if filename:
+        # (phase, section). audio and cover are timed on their own, everything else counts as assembly
+        sections = [(None, self.Header), (None, s_hash), (None, metadata), (None, pointers), (None, self.strings), (None, self.custom_data),
+                    ("audio", audio_bytes), ("cover", cover_bytes), (None, self.marker_definitions), (None, self.Markers)]
+
+        if not filename:
+            self.SSPMData = bytearray(sum(len(section) for _, section in sections)) # filled in place, one copy of every section
+            self._WriteSections(self.SSPMData, sections, stats)
+            return self.SSPMData
+
+        # Sections go straight to the file one after another, the whole map is never put together in memory
+        self.SSPMData = None
+        if isinstance(filename, str):
             with open(filename, 'wb') as f:
-                f.write(self.SSPMData)
-            return None
-        
-        return self.SSPMData
+                self._WriteSections(f, sections, stats)
+        else:
+            self._WriteSections(filename, sections, stats)
+
+        return None
         
 
         raise NotImplementedError("Writing SSPM files at this time is being actively worked on. This currently does not function yet") # Old
 
-    def ReadSSPM(self, file: str | BinaryIO, debug: bool = False):
+    def _ReadFixedHeader(self, file: BinaryIO) -> tuple:
+        """
+        Reads the first 128 bytes of a V2 file (everything before the strings). <br>
+        Returns `(stored hash, note count, pointers, shift)`. pointers are the 10 offset/length ints in file order.
+        shift is how far the marker pointers overshoot the end of the file (older versions wrote them 8 bytes too far per missing audio/cover block, markers are always last)
+        """
+        header = file.read(128) # signature, version, reserve, hash, metadata and pointers
+        if len(header) < 128 or header[0:4] != self.HEADER_SIGNATURE:
+            raise ValueError("SS+M signature was not found. What was found instead:", header[0:4])
+        if header[4:6] != self.DEFAULT_VERSION:
+            raise ValueError("Only SSPM v2 files are supported here. FOUND version:", int.from_bytes(header[4:6], 'little'))
+
+        pointers = [int.from_bytes(header[i:i + 8], 'little') for i in range(48, 128, 8)]
+        file_size = file.seek(0, 2)
+        shift = max(0, pointers[8] + pointers[9] - file_size)
+
+        return header[10:30], int.from_bytes(header[34:38], 'little'), pointers, shift
+
+    def VerifySSPM(self, file: str | BinaryIO, stats: SSPMStats = None) -> bool:
+        """
+        Checks the stored `Hash` of a V2 file against a SHA-1 of its marker definitions and markers. <br>
+        Only the fixed header is read, then it seeks straight to the markers and hashes them in chunks. Audio and cover are never read.
+
+        `File:` Takes in directory of sspm, or BinaryIO object.
+        `stats:` An `SSPMStats` to record the time and bytes of reading the header and hashing in.
+
+        Returns True if the hash matches, False if it doesnt (or the file is cut short)
+        """
+        if isinstance(file, str):
+            with open(file, "rb", buffering=0) as f:
+                return self.VerifySSPM(f, stats)
+
+        if stats is not None:
+            stats.start()
+        stored_hash, _, pointers, shift = self._ReadFixedHeader(file)
+        if stats is not None:
+            stats.lap("header", 128)
+        definitions_offset, definitions_length, marker_offset, marker_length = pointers[6:10]
+
+        hashed = sha1()
+        chunk = bytearray(self.VERIFY_CHUNK_SIZE)
+        view = memoryview(chunk)
+        for offset, length in ((definitions_offset - shift, definitions_length), (marker_offset - shift, marker_length)):
+            if offset < 0:
+                return False
+            file.seek(offset)
+            while length > 0:
+                read = file.readinto(view[:min(length, len(chunk))])
+                if not read: # cut short
+                    return False
+                hashed.update(view[:read])
+                length -= read
+
+        if stats is not None:
+            stats.lap("hashing", definitions_length + marker_length)
+        return hashed.digest() == stored_hash
+
+    PATCH_FIELDS = ("Difficulty", "map_rating", "requires_mod", "map_ID", "map_name", "song_name", "mappers", "custom_values")
+
+    def PatchSSPM(self, file: str, output: str = None, **changes):
+        """
+        Changes the metadata of a V2 file without reading or re-encoding its audio, cover or notes. <br>
+        `Difficulty`, `map_rating` and `requires_mod` are overwritten in the fixed header. `map_ID`, `map_name`, `song_name` and `mappers`
+        rewrite the strings, and `custom_values` (a dict) adds to/replaces fields in the custom data. The map ID is kept unless passed in.
+
+        When the strings (and custom data) keep their length the file is edited in place. Otherwise everything after them
+        is copied into a new file with `os.copy_file_range` (the kernel copies it, or the filesystem shares the blocks), the
+        pointers are moved to match and the new file replaces the old one. The hash stays valid since markers never change.
+
+        `output:` write the patched map here instead of replacing `file`
+
+        ```python
+        parser.PatchSSPM("map.sspm", Difficulty="Hard", mappers=["DigitalDemon", "Someone else"])
+        ```
+
+        ***Returns itself*** with the patched metadata (like `ReadSSPM` with `metadata_only`)
+        """
+        unknown = set(changes) - set(self.PATCH_FIELDS)
+        if unknown:
+            raise ValueError("Only these can be patched:", self.PATCH_FIELDS, "FOUND:", sorted(unknown))
+
+        with open(file, "rb") as f:
+            _, _, pointers, shift = self._ReadFixedHeader(f)
+            f.seek(0)
+            header = f.read(128)
+            f.seek(0)
+            self.ReadSSPM(f, metadata_only=True)
+            strings_end = f.tell()
+            f.seek(128)
+            raw_strings = f.read(strings_end - 128) # as stored, ReadSSPM cleans some of them up (commas in the map ID)
+            file_size = f.seek(0, 2)
+
+            custom_data = None
+            if "custom_values" in changes: # lazy values are read here while the file is still open
+                f.seek(pointers[0])
+                values = self._ReadCustomData(f, lazy=True)
+                values.update(changes["custom_values"])
+                custom_data = self._EncodeCustomData(values)
+                self.custom_values = values
+
+        for key in ("Difficulty", "map_rating", "requires_mod", "map_ID", "map_name", "song_name", "mappers"):
+            if key in changes:
+                setattr(self, key, changes[key])
+
+        difficulty = self.DIFFICULTIES.get(self.Difficulty, self.Difficulty)
+        difficulty = difficulty if isinstance(difficulty, int) else difficulty[0]
+        map_rating = self.map_rating if isinstance(self.map_rating, (bytes, bytearray)) else pack("<H", self.map_rating)
+        requires_mod = b"\x01" if self.requires_mod in (1, True, b"\x01") else b"\x00"
+
+        # only the strings being changed are encoded again, the rest keep their bytes
+        map_ID, map_name, song_name, mappers = self._SplitStrings(raw_strings)
+        strings = bytearray()
+        for key, raw in (("map_ID", map_ID), ("map_name", map_name), ("song_name", song_name)):
+            strings += self._EncodeString(changes[key]) if key in changes else raw
+        if "mappers" in changes:
+            strings += pack("<H", len(changes["mappers"]))
+            for mapper in changes["mappers"]:
+                strings += self._EncodeString(mapper)
+        else:
+            strings += mappers
+
+        # everything from 128 up to tail_start is replaced by head, the tail moves by delta
+        if custom_data is not None:
+            tail_start = max(strings_end, pointers[0] + pointers[1])
+            head = bytes(strings) + custom_data
+        else:
+            tail_start = strings_end
+            head = bytes(strings)
+        delta = len(head) - (tail_start - 128)
+
+        pointers = list(pointers)
+        pointers[6] -= shift # older files had these too far, fixed while at it
+        pointers[8] -= shift
+        for i in range(0, 10, 2):
+            if pointers[i] >= tail_start:
+                pointers[i] += delta
+        if custom_data is not None:
+            pointers[0], pointers[1] = 128 + len(strings), len(custom_data)
+
+        header = header[:42] + bytes((difficulty,)) + map_rating + header[45:47] + requires_mod + pack("<10Q", *pointers)
+
+        if output is None and delta == 0: # nothing moves, only the changed bytes get written
+            with open(file, "r+b") as f:
+                f.write(header)
+                f.write(head)
+            return self
+
+        target = output or file
+        with open(file, "rb") as source, NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(target)), suffix=".sspm", delete=False) as destination:
+            try:
+                destination.write(header)
+                destination.write(head)
+                self._CopyRange(source, destination, tail_start, file_size - tail_start)
+            except BaseException:
+                destination.close()
+                os.remove(destination.name)
+                raise
+        copymode(file, destination.name)
+        os.replace(destination.name, target) # the old file stays untouched until the new one is complete
+
+        return self
+
+    def _SplitStrings(self, raw: bytes) -> tuple:
+        # raw bytes of map ID, map name, song name (with their length prefixes) and the whole mapper list
+        parts, position = [], 0
+        for _ in range(3):
+            end = position + 2 + int.from_bytes(raw[position:position + 2], "little")
+            parts.append(raw[position:end])
+            position = end
+        parts.append(raw[position:])
+        return tuple(parts)
+
+    @staticmethod
+    def _AsASCII(value) -> bytes:
+        # str or bytes (set by hand, or left by older versions that encoded in place)
+        return value.encode("ASCII") if isinstance(value, str) else bytes(value)
+
+    def _EncodeString(self, value: str) -> bytes:
+        # u16 length + ASCII, same as WriteSSPM
+        encoded = value.encode("ASCII") if isinstance(value, str) else bytes(value)
+        return pack("<H", len(encoded)) + encoded
+
+    def _CopyRange(self, source: BinaryIO, destination: BinaryIO, offset: int, count: int) -> None:
+        """
+        Copies `count` bytes from `offset` in `source` to the end of `destination`. Uses `os.copy_file_range` so the data doesnt
+        pass through python, and falls back to reading in chunks where it isnt supported
+        """
+        destination.flush()
+        position = destination.tell()
+        try:
+            while count:
+                copied = os.copy_file_range(source.fileno(), destination.fileno(), count, offset, position)
+                if not copied:
+                    break
+                offset, position, count = offset + copied, position + copied, count - copied
+        except (AttributeError, OSError): # not linux, or a filesystem that doesnt support it
+            pass
+
+        destination.seek(position)
+        source.seek(offset)
+        while count:
+            chunk = source.read(min(count, self.VERIFY_CHUNK_SIZE))
+            if not chunk:
+                raise ValueError("File ended before the end of the last section")
+            destination.write(chunk)
+            count -= len(chunk)
+
+    def IterNotes(self, file: str | BinaryIO, chunk_size: int = 65536):
+        """
+        Decodes the notes of a V2 file `chunk_size` at a time without reading the rest of the file or holding all notes. <br>
+        Yields `NoteArray`s in the order the notes are stored in the file (not sorted, unlike `ReadSSPM`).
+
+        `File:` Takes in directory of sspm, or BinaryIO object.
+        """
+        if isinstance(file, str):
+            with open(file, "rb") as f:
+                yield from self.IterNotes(f, chunk_size)
+            return
+
+        _, note_count, pointers, shift = self._ReadFixedHeader(file)
+        marker_offset = pointers[8] - shift
+        file.seek(marker_offset)
+
+        grid_size, quantum_size = 8, 14
+        pending = b""
+        remaining = note_count
+        while remaining:
+            block = file.read(max(chunk_size * quantum_size - len(pending), 0))
+            data = pending + block
+            # any chunk_size records fit in chunk_size * 14 bytes, at the end of the file whatever is left has to be there
+            count = min(remaining, len(data) // quantum_size) if block else remaining
+            x, y, ms, quantum = self._DecodeMarkers(data, count)
+
+            used = count * grid_size + int(quantum.sum()) * (quantum_size - grid_size)
+            pending = data[used:]
+            remaining -= count
+            yield NoteArray(x, y, ms, quantum)
+
+    def _WriteSections(self, sink: BinaryIO | bytearray, sections: list, stats: SSPMStats = None) -> int:
+        """
+        Writes each `(phase, section)` to `sink` in order, a file object or a bytearray of the total size that gets filled in. <br>
+        Sections with a phase are lapped as that phase, the bytes in between as "assembly". Returns the total amount of bytes written
+        """
+        buffer = memoryview(sink) if isinstance(sink, bytearray) else None
+        written = pending = 0
+        for phase, section in sections:
+            if phase is not None and pending and stats is not None:
+                stats.lap("assembly", pending)
+                pending = 0
+
+            size = len(section)
+            if buffer is not None:
+                buffer[written:written + size] = section
+            else:
+                sink.write(section)
+            written += size
+
+            if phase is None:
+                pending += size
+            elif stats is not None:
+                stats.lap(phase, size)
+
+        if pending and stats is not None:
+            stats.lap("assembly", pending)
+        return written
+
+    def ReadSSPM(self, file: str | BinaryIO, debug: bool = False, columnar: bool = False, metadata_only: bool = False, memory_map: bool = False, stats: SSPMStats = None):
         """
         Reads and processes any SSPM file. <br>
         `File:` Takes in directory of sspm, or BinaryIO object stored in memory.
         `debug:` Useful for getting readable outputs of steps taken.
+        `columnar:` Stores `Notes` as a `NoteArray` instead of a list of tuples. Uses far less memory on big maps.
+        `metadata_only:` Stops after the strings (map_ID, map_name, song_name, mappers). Audio, cover and notes are never read
+        and when given a path only the start of the file is loaded. Useful for scanning large map folders.
+        `memory_map:` Memory maps the file instead of loading it (paths only). `audio_bytes` and `cover_bytes` become
+        memoryviews into the file, so nothing is copied until they are used.
+        `stats:` An `SSPMStats` to record the time and bytes of every phase in. Nothing is timed without it.
         ## Warning
         SSPM (Sound space plus map file) version 1 is not supported at this time. loading this file may raise errors
         <br><br>
@@ -374,9 +1162,9 @@ class SSPMParser:
         6. `mappers`: a list containing each mapper.
         7. `mapName`: The name given to the map.
         8. `songName`: The original name of the audio before imported. Usually left as artist name - song name
-        9. `customValues`: NOT IMPLEMENTED | will return a dictionary of found custom blocks.
+        9. `custom_values`: a `CustomValues` mapping of every custom data field (`custom_fields` has their type, offset and length in the file).
         10. `isQuantum`: Determins if the level contains ANY float value notes.
-        11. `Notes`: A list of tuples containing all notes. | 
+        11. `Notes`: A list of tuples containing all notes (or a `NoteArray` if `columnar`). |
         Example of what it Notes is: `[(x, y, ms), (x, y, ms), (x, y, ms) . . .]`
         
         <br><br> ***Returns itself***
@@ -385,12 +1173,27 @@ class SSPMParser:
 
         self.cover_bytes = None
         self.audio_bytes = None
+        self.Notes = None
+        self.custom_values = CustomValues() # V1 and metadata only reads have none
+        self.custom_fields = {}
+        if stats is not None:
+            stats.start()
 
         if isinstance(file, str): # If its a directory we convert it.
+            if metadata_only: # everything needed is in the first few hundred bytes, so no loading the whole file
+                with open(file, "rb", buffering=self.METADATA_READ_SIZE) as f:
+                    return self.ReadSSPM(f, debug=debug, metadata_only=True, stats=stats)
+
             with open(file, "rb") as f:
-                file_bytes = BytesIO(f.read())
+                if memory_map: # pages are only loaded from disk when touched
+                    file_bytes = mmap(f.fileno(), 0, access=ACCESS_READ)
+                else:
+                    file_bytes = BytesIO(f.read())
+            if stats is not None:
+                stats.lap("load", 0 if memory_map else len(file_bytes.getbuffer()))
         else:
             file_bytes = file
+        start = file_bytes.tell() # bytes per phase are counted from here, file objects may not start at 0
                 
         self.Header = { # all ascii
             "Signature": file_bytes.read(4),
@@ -406,122 +1209,39 @@ class SSPMParser:
         if self.Header.get("Signature") != b"\x53\x53\x2b\x6d":
             raise ValueError("SS+M signature was not found. What was found instead:", self.Header.get("Signature"))
         if self.Header.get("Version") == 2:
-            self._ProcessSSPMV2(file_bytes)
+            # only a memory map this parser made itself stays readable after returning, file objects passed in may get closed
+            self._ProcessSSPMV2(file_bytes, columnar, metadata_only, stats, start, lazy_custom=isinstance(file, str) and memory_map)
         elif self.Header.get("Version") == 1:
-            self._ProcessSSPMV1(file_bytes)
+            self._ProcessSSPMV1(file_bytes, columnar, metadata_only, stats, start)
         else:
             raise ValueError("SSPM version does not match known versions. Versions (1, 2) FOUND:", self.Header.get("Version"))
 
 
         return self
     
-    def _ProcessSSPMV2(self, file_bytes: BinaryIO):
-        
-        # static metadata
-
-        self.Hash = file_bytes.read(20)
-        self.last_ms = int.from_bytes(file_bytes.read(4), 'little') # 32bit uint
-        self.note_count = file_bytes.read(4) # 32bit uint
-        self.marker_count = file_bytes.read(4) # No clue what this is, ill figure it out | 32bit uint
-        
-        self.Difficulty = file_bytes.read(1) # 0x00 01 02 03 04 05
-        self.map_rating = file_bytes.read(2) # 16bit uint
-        self.contains_audio = file_bytes.read(1) # 0x00 01?
-        self.contains_cover = file_bytes.read(1) # 0x00 01?
-        self.requires_mod = file_bytes.read(1) # 0x00 01?
+    def _ProcessSSPMV2(self, file_bytes: BinaryIO, columnar: bool = False, metadata_only: bool = False, stats: SSPMStats = None, start: int = 0, lazy_custom: bool = False):
 
-        # pointers | If not present then is left as 8 bytes of 0
-        self.custom_data_offset = file_bytes.read(8)
-        self.custom_data_length = file_bytes.read(8)
-        self.audio_offset = file_bytes.read(8)
-        self.audio_length = file_bytes.read(8)
-        self.cover_offset = file_bytes.read(8)
-        self.cover_length = file_bytes.read(8)
-        self.marker_definitions_offset = file_bytes.read(8)
-        self.marker_definitions_length = file_bytes.read(8)
-        self.marker_offset = file_bytes.read(8)
-        self.marker_length = file_bytes.read(8)
+        self._ProcessSSPMV2Metadata(file_bytes, stats, start)
+        if metadata_only:
+            return self
 
-        # VariableLength Items..
-        self.map_ID = self._GetNextVariableString(file_bytes).replace(",", "")
-        self.map_name = self._GetNextVariableString(file_bytes)
-        self.song_name = self._GetNextVariableString(file_bytes)
-
-        for i in range(len(self.map_ID)): # getting mapID
-            if self.map_ID[i] in self.INVALID_CHARS: # Create invalidChars thing
-                self.map_ID = self.map_ID[:i] + '_' + self.map_ID[i+1:]
-        
-        mapper_count = file_bytes.read(2)
-        self.mapper_count_float = int.from_bytes(mapper_count, byteorder="little") #np.uint16(mapperCount)
-        self.mappers = [] # for now
-        
-        for i in range(self.mapper_count_float): # Can have multiple mappers in a file.
-            
-            if True:
-            #try: # temporary solution until I figure out whats happening
-                self.mappers.append(self._GetNextVariableString(file_bytes))
-            #except:
-            #    pass
+        # Custom data. A bad block only loses the custom values, audio is found through its own pointer below
         try:
-            # Oh god Custom data.... | Only supports custom difficulty thus far
-            custom_data = file_bytes.read(2) # ??
-            self.custom_data_total_length = np.uint16(custom_data)
-            
-            for i in range(self.custom_data_total_length):
-                field = self._GetNextVariableString(file_bytes)
-                id = file_bytes.read(1)
-                if id[0] == "\x00": # no 0x08 and 0x0a according to SSQE...
-                    continue
-                elif id[0] == "\x01":
-                    file_bytes.read(1) # skipping
-                elif id[0] == "\x02":
-                    file_bytes.read(2) # skipping
-                elif id[0] == "\x03":
-                    pass
-                elif id[0] == "\x04":
-                    pass
-                elif id[0] == "\x05":
-                    file_bytes.read(4) # skipping
-                elif id[0] == "\x06":
-                    file_bytes.read(8) # skipping
-                elif id[0] == "\x07":
-                    case_type = file_bytes.read(1)
-                    if case_type == "\x00":
-                        file_bytes.read(2)
-                    elif case_type == "\x01":
-                        file_bytes.read(2) # Possible Bug: In SSQE, reads only 2 bytes from 16 sized buffer...
-                    break
-                elif id[0] == "\x08":
-                    self._GetNextVariableString(file_bytes)
-                    break
-                elif id[0] == "\x09": # Custom difficulty. NOT FULLY IMPLEMENTED
-                    if self.strict:
-                        warn("Custom difficulty in V2 and V1 Not supported. Was found in sspm. View raw form by using .CustomDifficulty @self", Warning)
-                    self.custom_difficulty = self._GetNextVariableString(file_bytes)
-                    
-                elif id[0] == "\x0a":
-                    self._GetNextVariableString(file_bytes, fourbytes=True) # BUG: Make sure to implement fourbytes method here. Shouldnt cause issues right now...
-                    break
-                elif id[0] == "\x0b":
-                    warn("CustomBlocks in V2 and V1 Not supported. Was found in sspm.", Warning)
-                    self._GetNextVariableString(file_bytes, fourbytes=True) # BUG: Make sure to implement fourbytes method here.
-                    break
-                elif id[0] == "\x0c": # no more PLEASEEE
-                    warn("CustomBlocks in V2 and V1 Not supported. Was found in sspm.", Warning)
-
-                    file_bytes.read(1)
-                    value_length = file_bytes.read(4)
-                    value_length_f = np.uint32(value_length)
-                    
-                    file_bytes.read(value_length_f) # I hope???
-                    break
-
+            custom_data_offset = int.from_bytes(self.custom_data_offset, 'little')
+            if custom_data_offset:
+                file_bytes.seek(custom_data_offset)
+            self._ReadCustomData(file_bytes, lazy=lazy_custom)
         except Exception as e:
+            self.custom_values = CustomValues()
+            self.custom_fields = {}
             if self.strict:
-                warn("Couldnt properly read customData in V2/V1 sspm. Fell back to audio pointer", BytesWarning)
+                warn(f"Couldnt properly read customData in V2 sspm ({e}). Fell back to audio pointer", BytesWarning)
+        self.custom_data_total_length = len(self.custom_values)
+        self.custom_difficulty = self.custom_values.get("difficulty_name")
     
-        # If all fails, fallback to audio pointer
-        self.audio_offset_f = np.int64(int.from_bytes(self.audio_offset, byteorder='little'))
+        self.audio_offset_f = int.from_bytes(self.audio_offset, byteorder='little')
+        if stats is not None:
+            stats.lap("custom_data", int.from_bytes(self.custom_data_length, 'little'))
         
         # Get pointer from bytes
         file_bytes.seek(self.audio_offset_f)
@@ -529,16 +1249,21 @@ class SSPMParser:
         # reading optional data...
         #print(self.containsAudio[0])
         if self.contains_audio[0] == 1: # found audio
-            self.total_audio_length_f = np.int64(int.from_bytes(self.audio_length, 'little'))
+            self.total_audio_length_f = int.from_bytes(self.audio_length, 'little')
             
-            self.audio_bytes = file_bytes.read(self.total_audio_length_f)
+            self.audio_bytes = self._ReadBlob(file_bytes, self.total_audio_length_f)
             #print(fileBytes.tell())
+        if stats is not None:
+            stats.lap("audio", len(self.audio_bytes) if self.audio_bytes is not None else 0)
 
         if self.contains_cover[0] == 1: # True
-            self.total_cover_length_f = np.int64(int.from_bytes(self.cover_length, 'little'))
+            self.total_cover_length_f = int.from_bytes(self.cover_length, 'little')
             #print(self.totalCoverLengthF)
-            self.cover_bytes = file_bytes.read(self.total_cover_length_f)
+            self.cover_bytes = self._ReadBlob(file_bytes, self.total_cover_length_f)
             #print(fileBytes.tell())
+        if stats is not None:
+            stats.lap("cover", len(self.cover_bytes) if self.cover_bytes is not None else 0)
+        definitions_start = file_bytes.tell()
 
 
         # LAST ANNOYING PART!!!!!! MARKERS..
@@ -558,69 +1283,255 @@ class SSPMParser:
             definition_data = int.from_bytes(b"\x01", 'little')
             while definition_data != int.from_bytes(b"\x00", 'little'): # Read until null BUG HERE
                 definition_data = int.from_bytes(file_bytes.read(1), 'little')
+        if stats is not None:
+            stats.lap("marker_definitions", file_bytes.tell() - definitions_start)
         
         if not self.has_notes: # No notes
             return self.map_data
         
-        # process notes
-        #print("| | |", fileBytes.tell())
-        note_count_f = np.uint32(int.from_bytes(self.note_count, 'little'))
-        Notes = []
-        is_quantum_checker = False
-
-        for i in range(note_count_f): # Could be millions of notes. Make sure to keep optimized
-            ms = file_bytes.read(4)
-            marker_type = file_bytes.read(1)
-            #print(fileBytes.tell())
-            
-            is_quantum = int.from_bytes(file_bytes.read(1), 'little')
-            
+        # process notes | whole marker block is read once and decoded in bulk
+        note_count_f = int.from_bytes(self.note_count, 'little')
+        marker_length_f = int.from_bytes(self.marker_length, 'little')
+
+        # Markers follow the definitions directly. Not seeking to marker_offset on purpose,
+        # maps written without audio/cover by older versions have that pointer 8 bytes too far.
+        marker_data = self._ReadBlob(file_bytes, marker_length_f) if marker_length_f else file_bytes.read()
+
+        x, y, ms, quantum = self._DecodeMarkers(marker_data, note_count_f)
+
+        self.Notes = self._BuildNotes(x, y, ms, quantum, columnar) # Sort by time
+        self.is_quantum = bool(quantum.any())
+        if stats is not None:
+            stats.notes_decoded += note_count_f
+            stats.lap("markers", len(marker_data))
 
-            x_f = None
-            y_f = None
+        return self
 
-            if is_quantum == 0:
-                x = int.from_bytes(file_bytes.read(1), 'little')
-                y = int.from_bytes(file_bytes.read(1), 'little')
-                x_f = x
-                y_f = y
+    def _CustomValueSize(self, type_id: int, file_bytes: BinaryIO) -> int:
+        """
+        Size of the value after a type id, found by reading only its length prefix (if it has one)
+        """
+        if type_id == 0x00:
+            return 0
+        if type_id in CustomValues.FIXED_TYPES:
+            return calcsize(CustomValues.FIXED_TYPES[type_id])
+        if type_id == CustomValues.POSITION:
+            return 3 if file_bytes.read(1) == b"\x00" else 9
+        if type_id in CustomValues.LENGTH_TYPES:
+            prefix = calcsize(CustomValues.LENGTH_TYPES[type_id])
+            return prefix + int.from_bytes(file_bytes.read(prefix), 'little')
+        if type_id == CustomValues.ARRAY:
+            return 5 + int.from_bytes(file_bytes.read(5)[1:], 'little')
+        raise ValueError("Unknown custom data type:", type_id)
+
+    def _LoadCustomValue(self, file_bytes: BinaryIO, type_id: int, offset: int, length: int):
+        # reads a value skipped by _ReadCustomData. File objects have to still be open
+        position = file_bytes.tell()
+        try:
+            file_bytes.seek(offset)
+            return CustomValues.decode(type_id, self._ReadBlob(file_bytes, length))[0]
+        finally:
+            file_bytes.seek(position)
 
+    def _ReadCustomData(self, file_bytes: BinaryIO, lazy: bool = True) -> CustomValues:
+        """
+        Reads the custom data block into `custom_values` and indexes every field in `custom_fields` as `(type id, offset, length)`. <br>
+        Only names, type ids and length prefixes are read. With `lazy`, values over `CUSTOM_LAZY_SIZE` are seeked past and read when first used
+        """
+        self.custom_values = values = CustomValues()
+        self.custom_fields = {}
+
+        for _ in range(int.from_bytes(file_bytes.read(2), 'little')):
+            name = self._GetNextVariableString(file_bytes, encoding="UTF-8")
+            type_id = file_bytes.read(1)[0]
+            offset = file_bytes.tell()
+            length = self._CustomValueSize(type_id, file_bytes)
+            self.custom_fields[name] = (type_id, offset, length)
+
+            if type_id == CustomValues.ARRAY:
+                file_bytes.seek(offset)
+                values.types[name] = (type_id, file_bytes.read(1)[0])
             else:
-                is_quantum_checker = True
+                values.types[name] = type_id
 
-                x = file_bytes.read(4)
-                y = file_bytes.read(4)
+            if lazy and length > self.CUSTOM_LAZY_SIZE:
+                values._pending[name] = partial(self._LoadCustomValue, file_bytes, type_id, offset, length)
+                file_bytes.seek(offset + length)
+            else:
+                file_bytes.seek(offset)
+                values._values[name] = CustomValues.decode(type_id, file_bytes.read(length))[0]
 
-                x_f = np.frombuffer(x, dtype=np.float32)[0]
-                y_f = np.frombuffer(y, dtype=np.float32)[0]
+        return values
 
-                #xF = np.single(x) # numpy in clutch ngl
-                #yF = np.single(y)
-            
-            ms_f = np.uint32(int.from_bytes(ms, 'little'))
+    def _EncodeCustomData(self, values: dict) -> bytes:
+        """
+        Custom data block for `values` (a `CustomValues`, or a plain dict whose types are picked from the values)
+        """
+        if not isinstance(values, CustomValues):
+            values = CustomValues(values)
 
-            Notes.append((x_f, y_f, ms_f)) # F = converted lol
+        fields = [pack("<H", len(values))]
+        for name in values:
+            type_id = values.types[name]
+            name_f = name.encode("UTF-8")
+            fields.append(pack("<H", len(name_f)) + name_f + bytes((type_id[0] if isinstance(type_id, tuple) else type_id,)) + CustomValues.encode(type_id, values[name]))
+        return b"".join(fields)
 
-        self.Notes = sorted(Notes, key=lambda n: n[2]) # Sort by time
-        self.is_quantum = is_quantum_checker
+    def _ProcessSSPMV2Metadata(self, file_bytes: BinaryIO, stats: SSPMStats = None, start: int = 0):
+        """
+        Reads everything before the custom data in a V2 file. Hash, static metadata, pointers and strings
+        """
 
-        return self
+        # static metadata
+
+        self.Hash = file_bytes.read(20)
+        self.last_ms = int.from_bytes(file_bytes.read(4), 'little') # 32bit uint
+        self.note_count = file_bytes.read(4) # 32bit uint
+        self.marker_count = file_bytes.read(4) # No clue what this is, ill figure it out | 32bit uint
+        
+        self.Difficulty = file_bytes.read(1) # 0x00 01 02 03 04 05
+        self.map_rating = file_bytes.read(2) # 16bit uint
+        self.contains_audio = file_bytes.read(1) # 0x00 01?
+        self.contains_cover = file_bytes.read(1) # 0x00 01?
+        self.requires_mod = file_bytes.read(1) # 0x00 01?
+
+        # pointers | If not present then is left as 8 bytes of 0
+        self.custom_data_offset = file_bytes.read(8)
+        self.custom_data_length = file_bytes.read(8)
+        self.audio_offset = file_bytes.read(8)
+        self.audio_length = file_bytes.read(8)
+        self.cover_offset = file_bytes.read(8)
+        self.cover_length = file_bytes.read(8)
+        self.marker_definitions_offset = file_bytes.read(8)
+        self.marker_definitions_length = file_bytes.read(8)
+        self.marker_offset = file_bytes.read(8)
+        self.marker_length = file_bytes.read(8)
+        if stats is not None:
+            stats.lap("header", file_bytes.tell() - start)
+        strings_start = file_bytes.tell()
 
-    def NOTES2TEXT(self) -> str:
+        # VariableLength Items..
+        self.map_ID = self._GetNextVariableString(file_bytes).replace(",", "")
+        self.map_name = self._GetNextVariableString(file_bytes)
+        self.song_name = self._GetNextVariableString(file_bytes)
+
+        for i in range(len(self.map_ID)): # getting mapID
+            if self.map_ID[i] in self.INVALID_CHARS: # Create invalidChars thing
+                self.map_ID = self.map_ID[:i] + '_' + self.map_ID[i+1:]
+        
+        mapper_count = file_bytes.read(2)
+        self.mapper_count_float = int.from_bytes(mapper_count, byteorder="little") #np.uint16(mapperCount)
+        self.mappers = [] # for now
+        
+        for i in range(self.mapper_count_float): # Can have multiple mappers in a file.
+            
+            if True:
+            #try: # temporary solution until I figure out whats happening
+                self.mappers.append(self._GetNextVariableString(file_bytes))
+            #except:
+            #    pass
+        if stats is not None:
+            stats.lap("strings", file_bytes.tell() - strings_start)
+
+    def NOTES2TEXT(self, file: str | TextIO = None, chunk_size: int = 65536) -> str | NoneType:
         """
-        Converts Notes to the standard sound space text file form. Commonly used in Roblox sound space
+        Converts Notes to the standard sound space text file form. Commonly used in Roblox sound space <br>
+        If `file` (a path or an open text file) is passed in, the text is written to it `chunk_size` notes at a time instead of returned
         """
-        text_string = ''
-        for x, y, ms in self.Notes:
-            if text_string == '':
-                text_string+=f",{x}|{y}|{ms}"
+        if file is None:
+            return "".join(self._NoteTextChunks(chunk_size))
+
+        if isinstance(file, str):
+            with open(file, "w") as f:
+                return self.NOTES2TEXT(f, chunk_size)
+
+        for chunk in self._NoteTextChunks(chunk_size):
+            file.write(chunk)
+        return None
+
+    def _NoteTextChunks(self, chunk_size: int = 65536):
+        # Yields ",x|y|ms" text for chunk_size notes at a time
+        for start in range(0, len(self.Notes), chunk_size):
+            notes = self.Notes[start:start + chunk_size]
+
+            if isinstance(notes, NoteArray): # whole chunk in one % format, same text as formatting the tuples
+                rows = np.column_stack((notes.x.astype(np.int64), notes.y.astype(np.int64), notes.ms.astype(np.int64)))
+                if not notes.quantum.any():
+                    yield (",%d|%d|%d" * len(rows)) % tuple(rows.ravel().tolist())
+                    continue
+
+                # quantum notes print like f"{np.float32}" does (which formats it as a python float)
+                rows = rows.astype(object)
+                quantum = np.flatnonzero(notes.quantum)
+                rows[quantum, 0] = notes.x[quantum].astype(np.float64).tolist()
+                rows[quantum, 1] = notes.y[quantum].astype(np.float64).tolist()
+                yield (",%s|%s|%s" * len(rows)) % tuple(rows.ravel().tolist())
             else:
-                text_string+=f",{x}|{y}|{ms}"
-            
-        return text_string
+                yield "".join([f",{x}|{y}|{ms}" for x, y, ms in notes])
 
-    
-    def _ProcessSSPMV1(self, file_bytes: BinaryIO):
+    def TEXT2NOTES(self, text: str | TextIO, columnar: bool = False):
+        """
+        Reads notes from the sound space text form (`audio id,x|y|ms,x|y|ms...`), the opposite of `NOTES2TEXT`. <br>
+        `text:` the text itself, or an open text file.
+        `columnar:` Stores `Notes` as a `NoteArray` instead of a list of tuples.
+
+        Sets `Notes` and `audio_ID` (the part before the first comma, None if empty) so it can go straight into `WriteSSPM`.
+        Text without the audio id (starting with a note) raises a ValueError instead of losing its first note. <br>
+        Notes keep the order they are in the text. Values written as whole numbers become ints (grid notes), anything else floats (quantum),
+        so `NOTES2TEXT` gives back the same text for the list form.
+
+        ***Returns itself***
+        """
+        if not isinstance(text, str):
+            text = text.read()
+
+        audio_ID, _, body = text.strip().partition(",")
+        if "|" in audio_ID:
+            raise ValueError("The text has to start with the audio id (can be empty), followed by a comma. FOUND:", audio_ID)
+        self.audio_ID = audio_ID.strip() or None
+        body = body.rstrip().rstrip(",") # allows a trailing comma
+
+        # one pass over the bytes: the separators have to go |, |, "," for every note, and tokens containing any of
+        # ".eEnNiI" were written as floats (1.5, 1e3, nan, inf). Everything else is a whole number with maybe a sign/spaces
+        raw = np.frombuffer(body.encode(), dtype=np.uint8)
+        table = np.zeros(256, dtype=np.uint8)
+        table[[ord("|"), ord(",")]] = 1
+        table[list(b".eEnNiI")] = 2
+        kinds = table[raw]
+        separators = np.flatnonzero(kinds == 1)
+        count = len(separators) // 3 + 1 if body else 0
+
+        pattern = np.tile(np.frombuffer(b"||,", dtype=np.uint8), count)[:len(separators)]
+        if len(separators) != max(count * 3 - 1, 0) or not np.array_equal(raw[separators], pattern):
+            raise ValueError("Every note needs to be written as x|y|ms. FOUND:", next(note for note in body.split(",") if note.count("|") != 2))
+
+        tokens = body.replace("|", ",").split(",") if body else []
+        values = np.array(tokens, dtype=np.float64).reshape(-1, 3)
+        written_float = np.zeros(len(tokens), dtype=bool)
+        written_float[np.searchsorted(separators, np.flatnonzero(kinds == 2))] = True
+        written_float = written_float.reshape(-1, 3)
+
+        if written_float[:, 2].any():
+            raise ValueError("ms has to be a whole number. FOUND:", tokens[int(np.flatnonzero(written_float[:, 2])[0]) * 3 + 2].strip())
+        quantum = written_float[:, 0] | written_float[:, 1]
+
+        if columnar:
+            self.Notes = NoteArray(values[:, 0], values[:, 1], values[:, 2], quantum)
+        else:
+            columns = []
+            for column, floats in zip((values[:, 0], values[:, 1]), (written_float[:, 0], written_float[:, 1])):
+                with np.errstate(invalid="ignore"): # nan/inf are only in the float ones, which get replaced
+                    column_f = column.astype(np.int64).tolist()
+                floats = np.flatnonzero(floats)
+                for index, value in zip(floats.tolist(), column[floats].tolist()):
+                    column_f[index] = value
+                columns.append(column_f)
+            self.Notes = list(zip(*columns, values[:, 2].astype(np.int64).tolist()))
+
+        self.is_quantum = bool(quantum.any())
+        return self
+
+    def _ProcessSSPMV1(self, file_bytes: BinaryIO, columnar: bool = False, metadata_only: bool = False, stats: SSPMStats = None, start: int = 0):
         """
         just going to note, i will be using some of the self variables
         for compatibility with SSPMv2 (such as containsAudio, etc), and 
@@ -632,17 +1543,24 @@ class SSPMParser:
 
 
         # start of metadata
+        if stats is not None:
+            stats.lap("header", file_bytes.tell() - start)
+        strings_start = file_bytes.tell()
 
         self.map_ID = self._NewLineTerminatedString(file_bytes).replace(",", "")
         self.map_name = self._NewLineTerminatedString(file_bytes)
-        self.song_name = self.mapName # lol
+        self.song_name = self.map_name # lol
         self.mappers = self._NewLineTerminatedString(file_bytes).split(", ") # mappers arent in an array, so i will just split
 
         self.last_ms = file_bytes.read(4)
         self.note_count = file_bytes.read(4)
         self.Difficulty = file_bytes.read(1)
+        if stats is not None:
+            stats.lap("strings", file_bytes.tell() - strings_start) # V1 keeps last ms/note count/difficulty after the strings
 
         # end of metadata
+        if metadata_only:
+            return self
         
         # start of file data
 
@@ -657,11 +1575,13 @@ class SSPMParser:
                 self.contains_cover = b"\x01"
 
                 self.cover_length = file_bytes.read(8)
-                cover_length_to_int = np.int64(int.from_bytes(self.coverLength, 'little'))
+                cover_length_to_int = int.from_bytes(self.cover_length, 'little')
 
-                self.cover_bytes = file_bytes.read(cover_length_to_int)
+                self.cover_bytes = self._ReadBlob(file_bytes, cover_length_to_int)
             case _: # for no cover, or non supported format
                 self.contains_cover = b"\x00"
+        if stats is not None:
+            stats.lap("cover", len(self.cover_bytes) if self.cover_bytes is not None else 0)
 
         self.audio_type = int.from_bytes(file_bytes.read(1), 'little')
 
@@ -678,48 +1598,25 @@ class SSPMParser:
                 self.audio_length = file_bytes.read(8)
                 audio_length_to_int = int.from_bytes(self.audio_length, 'little')
 
-                self.audio_bytes = file_bytes.read(audio_length_to_int) # must be mp3 or OGG
+                self.audio_bytes = self._ReadBlob(file_bytes, audio_length_to_int) # must be mp3 or OGG
+        if stats is not None:
+            stats.lap("audio", len(self.audio_bytes) if self.audio_bytes is not None else 0)
 
         # end of file data
 
         # start of note data
 
         note_count_to_int = int.from_bytes(self.note_count, 'little')
-        Notes = []
-        is_quantum_checker = False
-
-        for i in range(note_count_to_int):
-            ms = file_bytes.read(4)
-            
-            # i can just copy and paste the rest of this since its the same
-
-            is_quantum = int.from_bytes(file_bytes.read(1), 'little')
 
-            x_f = None
-            y_f = None
+        # markers are the last thing in V1 so the rest of the file is the marker block
+        marker_data = file_bytes.read()
+        x, y, ms, quantum = self._DecodeMarkers(marker_data, note_count_to_int, V2=False)
 
-            if is_quantum == 0:
-                x = int.from_bytes(file_bytes.read(1), 'little')
-                y = int.from_bytes(file_bytes.read(1), 'little')
-                x_f = x
-                y_f = y
-
-            else:
-                is_quantum_checker = True
-
-                x = file_bytes.read(4)
-                y = file_bytes.read(4)
-
-                x_f = np.frombuffer(x, dtype=np.float32)[0]
-                y_f = np.frombuffer(y, dtype=np.float32)[0]
-            
-            ms_f = np.uint32(int.from_bytes(ms, 'little'))
-
-            Notes.append((x_f, y_f, ms_f))
-
-        
-        self.Notes = sorted(Notes, key=lambda n: n[2]) # Sort by time
-        self.is_quantum = is_quantum_checker
+        self.Notes = self._BuildNotes(x, y, ms, quantum, columnar) # Sort by time
+        self.is_quantum = bool(quantum.any())
+        if stats is not None:
+            stats.notes_decoded += note_count_to_int
+            stats.lap("markers", len(marker_data))
 
         return self
         
@@ -0,0 +1,145 @@
+"""
+Content-addressed store for audio and covers, so maps that share a song (difficulty variants, re-uploads) share one copy.
+
+Blobs are keyed by the SHA-256 of their bytes. Parsers added to the store have their `audio_bytes`/`cover_bytes`
+replaced with a view of the stored blob, and `export` writes .sspm files back out from those references.
+
+```python
+from pysspm_rhythia.store import BlobStore
+
+store = BlobStore("library/") # or BlobStore() to only keep blobs in memory
+easy = store.read("easy.sspm")
+hard = store.read("hard.sspm")
+easy.audio_digest == hard.audio_digest # same song, stored once
+
+store.export(hard, "hard_copy.sspm")
+```
+"""
+import os
+from hashlib import sha256
+from mmap import mmap, ACCESS_READ
+from tempfile import NamedTemporaryFile
+
+from pysspm_rhythia.pysspm import SSPMParser
+
+
+class BlobStore:
+    """
+    # Blob Store
+
+    ### Holds each distinct audio/cover once, keyed by digest.
+
+    With a `directory` blobs are saved as `<directory>/<first 2 hex>/<digest>` and memory mapped when read, otherwise they are kept in memory.
+    `get` always returns the same memoryview for a digest, so every parser referencing it shares the memory.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory
+        self._views = {} # digest: memoryview handed out by get
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data) -> str:
+        """
+        Adds a blob (bytes or any buffer) and returns its digest. Does nothing besides hashing if it is already stored
+        """
+        digest = sha256(data).hexdigest()
+        if digest in self:
+            return digest
+
+        if self.directory is None:
+            self._views[digest] = memoryview(bytes(data))
+            return digest
+
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f: # written fully before it gets its real name
+            f.write(data)
+        os.replace(f.name, path)
+
+        return digest
+
+    def get(self, digest: str) -> memoryview:
+        """
+        Returns the blob as a read only memoryview. Raises KeyError if it isnt stored
+        """
+        view = self._views.get(digest)
+        if view is not None:
+            return view
+        if self.directory is None or not os.path.exists(self._path(digest)):
+            raise KeyError(digest)
+
+        with open(self._path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0: # empty files cant be mapped
+                view = memoryview(b"")
+            else:
+                view = memoryview(mmap(f.fileno(), 0, access=ACCESS_READ))
+
+        self._views[digest] = view
+        return view
+
+    def remove(self, digest: str) -> None:
+        """
+        Removes a blob. Parsers still referencing it keep working, the memory is freed once they let go
+        """
+        self._views.pop(digest, None)
+        if self.directory is not None and os.path.exists(self._path(digest)):
+            os.remove(self._path(digest))
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._views or (self.directory is not None and os.path.exists(self._path(digest)))
+
+    def __iter__(self):
+        if self.directory is None:
+            return iter(list(self._views))
+        return iter(sorted(name for folder in os.scandir(self.directory) if folder.is_dir() for name in os.listdir(folder.path) if len(name) == 64)) # skips half written temp files
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Total size of all stored blobs
+        """
+        if self.directory is None:
+            return sum(view.nbytes for view in self._views.values())
+        return sum(os.path.getsize(self._path(digest)) for digest in self)
+
+    def intern(self, parser: SSPMParser) -> SSPMParser:
+        """
+        Moves the audio and cover of a parser into the store. `audio_bytes`/`cover_bytes` become views of the stored blobs
+        and the parser gets `audio_digest`/`cover_digest` (None when it has no audio/cover).
+        """
+        for name in ("audio", "cover"):
+            data = getattr(parser, f"{name}_bytes")
+            digest = self.put(data) if data is not None else None
+            setattr(parser, f"{name}_digest", digest)
+            setattr(parser, f"{name}_bytes", self.get(digest) if digest else None)
+
+        return parser
+
+    def read(self, file: str, columnar: bool = False) -> SSPMParser:
+        """
+        Reads a map and interns its audio/cover. Paths are memory mapped while reading so the audio is only copied into the store when it's new
+        """
+        return self.intern(SSPMParser().ReadSSPM(file, columnar=columnar, memory_map=isinstance(file, str)))
+
+    def export(self, parser: SSPMParser, filename, audio_digest: str = None, cover_digest: str = None, **kwargs):
+        """
+        Writes a map using the stored audio/cover. `audio_digest`/`cover_digest` default to the ones set by `intern`.
+        The blobs are streamed into the file from the store (see `SSPMParser.WriteSSPM`), any `**kwargs` are passed on to it.
+        """
+        audio_digest = audio_digest or getattr(parser, "audio_digest", None)
+        cover_digest = cover_digest or getattr(parser, "cover_digest", None)
+
+        return parser.WriteSSPM(
+            filename,
+            audio_bytes=self.get(audio_digest) if audio_digest else None,
+            cover_bytes=self.get(cover_digest) if cover_digest else None,
+            **kwargs,
+        )
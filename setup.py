@@ -26,6 +26,12 @@ setup(
             "pytest",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "sspm-catalog=pysspm_rhythia.catalog:main",
+            "sspm-convert=pysspm_rhythia.convert:main",
+        ],
+    },
     keywords=["Rhythia", "Sound space", "SSPM", "Rhythm game", "pysspm-rhythia", "pysspm"],
     include_package_data=True,
 )
@@ -3,6 +3,7 @@ import pytest
 import importlib.util
 import sys
 import os
+from io import BytesIO
 
 # Define the path to pysspm_rhythia.py
 pysspm_rhythia_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'pysspm_rhythia', 'pysspm.py'))
@@ -15,6 +16,13 @@ spec.loader.exec_module(pysspm_rhythia)
 
 SSPMParser = pysspm_rhythia.SSPMParser
 
+from pysspm_rhythia import catalog
+from pysspm_rhythia.catalog import build_catalog, update_catalog, verify_maps, patch_maps
+from pysspm_rhythia.dedup import DedupIndex
+from pysspm_rhythia.store import BlobStore
+from pysspm_rhythia import aio
+from pysspm_rhythia.convert import convert_maps
+
 SHAREDNOTES = [(1, 1, 500), (0, 1, 250), (2, 0, 1500)]
 with open("./tests/TestSong.mp3", "rb") as f:
     SHAREDAUDIO = f.read()
@@ -72,6 +80,462 @@ def test_EXTRAS_conversion():
     print(notes_text)
     assert notes_text == ",0|1|250,1|1|500,2|0|1500" # UPDATED: now automatically sorts by time
 
+def test_notes2text_to_file(tmp_path): # streamed text is the same as the returned text
+    parser = SSPMParser().ReadSSPM("./tests/Test.sspm", columnar=True)
+    path = str(tmp_path / "notes.txt")
+    parser.NOTES2TEXT(path, chunk_size=100)
+
+    with open(path) as f:
+        assert f.read() == parser.NOTES2TEXT() == SSPMParser().ReadSSPM("./tests/Test.sspm").NOTES2TEXT()
+
+def test_text2notes(): # text form back into notes, and straight into a sspm file
+    text = "1234567,1|0|100,0.5|1.25|200,2|2|300,"
+    parser = SSPMParser().TEXT2NOTES(text)
+
+    assert parser.audio_ID == "1234567"
+    assert parser.Notes == [(1, 0, 100), (0.5, 1.25, 200), (2, 2, 300)]
+    assert parser.NOTES2TEXT() == text[len("1234567"):-1]
+
+    columnar = SSPMParser().TEXT2NOTES(text, columnar=True)
+    assert list(columnar.Notes.quantum) == [False, True, False]
+
+    data = parser.WriteSSPM(audio_bytes=None, cover_bytes=None, map_name="From text", mappers=["Test"])
+    assert SSPMParser().ReadSSPM(BytesIO(data)).Notes == [(1, 0, 100), (0.5, 1.25, 200), (2, 2, 300)]
+
+    text = ",-1|0|100,2|-0.5|200,1|3|300"
+    assert SSPMParser().TEXT2NOTES(text).NOTES2TEXT() == text
+    assert SSPMParser().TEXT2NOTES(",-1|0|100,1|3|300", columnar=True).NOTES2TEXT() == ",-1|0|100,1|3|300"
+    assert SSPMParser().TEXT2NOTES("1, -1 | 0 |100 ,1|1| 200").Notes == [(-1, 0, 100), (1, 1, 200)]
+    with pytest.raises(ValueError):
+        SSPMParser().TEXT2NOTES("1,1|1|100.7")
+    with pytest.raises(ValueError): # no audio id, the first note would be dropped
+        SSPMParser().TEXT2NOTES("1|1|100,2|2|200")
+    with pytest.raises(ValueError):
+        SSPMParser().TEXT2NOTES("1,1|2,3|4|5|6") # right amount of values, split wrong
+
+    floats = SSPMParser().TEXT2NOTES("1,1.0|2|300,1e1|+2|400")
+    assert floats.Notes == [(1.0, 2, 300), (10.0, 2, 400)] and isinstance(floats.Notes[0][0], float) and isinstance(floats.Notes[0][1], int)
+    assert SSPMParser().TEXT2NOTES("1,").Notes == [] and SSPMParser().TEXT2NOTES("1,", columnar=True).Notes.ms.size == 0
+
+def test_read_mixed_markers(): # grid and quantum notes decoded together
+    parser = SSPMParser()
+    notes = [(1, 1, 500), (0.5, 1.25, 250), (2, 0, 1500), (1.75, 0, 1500), (0, 2, 100)]
+    data = parser.WriteSSPM(audio_bytes=None, cover_bytes=None, map_name="Mixed markers", mappers=["Test"], Notes=notes)
+    parser.ReadSSPM(BytesIO(data))
+
+    assert parser.Notes == sorted(notes, key=lambda n: n[2])
+    assert parser.is_quantum
+    assert isinstance(parser.Notes[0][0], int) # grid notes stay ints
+
+    many = [(i % 3, (i // 3) % 3, i) if i % 5 else (0.5, 1.25, i) for i in range(70000)] # start walk crosses a block
+    markers, _ = parser._EncodeMarkers(many)
+    x, y, ms, quantum = parser._DecodeMarkers(markers, len(many))
+    assert ms.tolist() == list(range(70000)) and quantum.tolist() == [i % 5 == 0 for i in range(70000)] and x[5] == 0.5
+    with pytest.raises(ValueError):
+        parser._DecodeMarkers(markers[:-3], len(many))
+
+def test_read_columnar_notes(): # NoteArray gives the same notes as the list form
+    parser = SSPMParser()
+    data = parser.WriteSSPM(audio_bytes=None, cover_bytes=None, map_name="Columnar", mappers=["Test"], Notes=[(1, 1, 500), (0.5, 1.25, 250), (2, 0, 1500)])
+    listed = SSPMParser().ReadSSPM(BytesIO(data))
+    columnar = SSPMParser().ReadSSPM(BytesIO(data), columnar=True)
+
+    assert isinstance(columnar.Notes, pysspm_rhythia.NoteArray)
+    assert list(columnar.Notes) == listed.Notes
+    assert columnar.NOTES2TEXT() == listed.NOTES2TEXT()
+    assert columnar.Notes[1:].ms.base is not None # slices share memory
+
+def test_write_markers_list_and_columnar(): # both note forms encode to the same bytes
+    notes = [(1, 1, 500), (0.5, 1.25, 250), (2.001, 0, 1500), (1.2, 0.995, 1600)]
+    listed = SSPMParser().WriteSSPM(audio_bytes=None, cover_bytes=None, map_name="Encode", mappers=["Test"], Notes=notes)
+    columnar = SSPMParser().WriteSSPM(audio_bytes=None, cover_bytes=None, map_name="Encode", mappers=["Test"], Notes=pysspm_rhythia.NoteArray.from_notes(notes))
+
+    assert listed == columnar
+    assert SSPMParser().ReadSSPM(BytesIO(listed)).Notes[2] == (2, 0, 1500) # 2.001 rounds onto the grid
+
+def test_read_metadata_only(tmp_path): # strings and header only, no notes/audio
+    path = str(tmp_path / "metadata_only.sspm")
+    SSPMParser().WriteSSPM(path, audio_bytes=b"\x00" * 100000, cover_bytes=None, Difficulty="Hard", map_name="Metadata only", mappers=["Test", "Other"], Notes=SHAREDNOTES)
+
+    parser = SSPMParser().ReadSSPM(path, metadata_only=True)
+    assert parser.map_name == "Metadata only"
+    assert parser.mappers == ["Test", "Other"]
+    assert parser.Difficulty == b"\x03"
+    assert int.from_bytes(parser.note_count, "little") == len(SHAREDNOTES)
+    assert parser.Notes is None and parser.audio_bytes is None
+
+def test_read_memory_map(): # audio/cover are views into the file instead of copies
+    loaded = SSPMParser().ReadSSPM("./tests/Test.sspm")
+    mapped = SSPMParser().ReadSSPM("./tests/Test.sspm", memory_map=True)
+
+    assert isinstance(mapped.audio_bytes, memoryview)
+    assert mapped.audio_bytes == loaded.audio_bytes
+    assert mapped.cover_bytes == loaded.cover_bytes
+    assert mapped.Notes == loaded.Notes
+
+def test_write_to_file_object(): # streamed sections match the returned bytes
+    sink = BytesIO()
+    SSPMParser().WriteSSPM(sink, cover_bytes=SHAREDCOVER, audio_bytes=SHAREDAUDIO, map_name="Streamed", mappers=["Test"], Notes=SHAREDNOTES)
+    data = SSPMParser().WriteSSPM(cover_bytes=SHAREDCOVER, audio_bytes=SHAREDAUDIO, map_name="Streamed", mappers=["Test"], Notes=SHAREDNOTES)
+
+    assert sink.getvalue() == data
+
+def test_write_pointers_without_audio(): # markers pointer lands on the markers when audio/cover are missing
+    parser = SSPMParser()
+    data = parser.WriteSSPM(cover_bytes=None, audio_bytes=None, map_name="No audio", mappers=["Test"], Notes=SHAREDNOTES)
+
+    marker_offset = int.from_bytes(parser.marker_offset, "little")
+    assert data[marker_offset:] == parser.Markers
+
+def test_import_without_numpy(): # metadata/verify never import numpy, notes do
+    import subprocess
+    code = (
+        "import sys; from pysspm_rhythia import SSPMParser; "
+        "parser = SSPMParser().ReadSSPM('./tests/Test.sspm', metadata_only=True); assert SSPMParser().VerifySSPM('./tests/Test.sspm'); "
+        "print(parser.map_name, 'numpy' in sys.modules); SSPMParser().ReadSSPM('./tests/Test.sspm'); print('numpy' in sys.modules)"
+    )
+    root = os.path.join(os.path.dirname(__file__), "..")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root, env={**os.environ, "PYTHONPATH": root}).stdout
+    assert output.split("\n")[:2] == [f"{SSPMParser().ReadSSPM('./tests/Test.sspm', metadata_only=True).map_name} False", "True"]
+
+def test_custom_data(tmp_path): # every type round trips, big values are only read when used
+    big = bytes(range(256)) * 400
+    values = {"difficulty_name": "Insane", "empty": None, "count": 70000, "speed": 1.5, "spot": (1, 2), "quantum_spot": (0.5, 1.25), "blob": big, "tags": ["a", "bc"]}
+    parser = SSPMParser()
+    parser.custom_values.update(values)
+    parser.custom_values.set("rating", 4, 0x01)
+    path = str(tmp_path / "custom.sspm")
+    parser.WriteSSPM(path, audio_bytes=SHAREDAUDIO, cover_bytes=None, map_name="Custom", mappers=["Test"], Notes=sorted(SHAREDNOTES, key=lambda note: note[2])) # sorted so reading and writing again gives the same bytes
+
+    loaded = SSPMParser().ReadSSPM(path)
+    assert dict(loaded.custom_values) == {**values, "rating": 4} and loaded.custom_difficulty == "Insane"
+    assert loaded.custom_values.types["rating"] == 0x01 and loaded.custom_values.types["tags"] == (0x0c, 0x09)
+
+    lazy = SSPMParser().ReadSSPM(path, memory_map=True)
+    type_id, offset, length = lazy.custom_fields["blob"]
+    assert (type_id, length) == (0x0a, len(big) + 4)
+    assert not lazy.custom_values.is_loaded("blob") and lazy.custom_values.is_loaded("tags")
+    assert lazy.custom_values["blob"] == big and lazy.Notes == loaded.Notes
+
+    with open(path, "rb") as f: # file objects passed in can be closed afterwards, so nothing is left to read later
+        from_file = SSPMParser().ReadSSPM(f)
+    assert from_file.custom_values.is_loaded("blob")
+    assert from_file.WriteSSPM(map_name="Custom", mappers=["Test"]) == open(path, "rb").read()
+
+def test_patch_sspm(tmp_path): # metadata changed without touching audio/notes, pointers follow the strings
+    import shutil
+    original = SSPMParser().ReadSSPM("./tests/Test.sspm")
+    path = str(tmp_path / "patched.sspm")
+    shutil.copy("./tests/Test.sspm", path)
+
+    SSPMParser().PatchSSPM(path, Difficulty="Hard") # same length, edited in place
+    assert os.path.getsize(path) == os.path.getsize("./tests/Test.sspm")
+    SSPMParser().PatchSSPM(path, map_name="A much longer name than before", mappers=["Someone", "Else"], custom_values={"difficulty_name": "Insane"})
+
+    patched = SSPMParser().ReadSSPM(path)
+    assert (patched.Difficulty, patched.map_name, patched.mappers, patched.map_ID) == (b"\x03", "A much longer name than before", ["Someone", "Else"], original.map_ID)
+    assert patched.custom_difficulty == "Insane" and SSPMParser().VerifySSPM(path)
+    assert patched.Notes == original.Notes and bytes(patched.audio_bytes) == bytes(original.audio_bytes) and bytes(patched.cover_bytes) == bytes(original.cover_bytes)
+
+    SSPMParser().PatchSSPM(path, map_ID="with,comma") # ReadSSPM drops the comma, a patch of something else must not
+    before = open(path, "rb").read()
+    SSPMParser().PatchSSPM(path, Difficulty="Easy")
+    after = open(path, "rb").read()
+    assert len(after) == len(before) and after[:42] == before[:42] and after[43:] == before[43:]
+
+    with open(str(tmp_path / "broken.sspm"), "wb") as f:
+        f.write(b"not a map")
+    patched_paths, errors = patch_maps(str(tmp_path), mappers=["Renamed"])
+    assert patched_paths == [path] and len(errors) == 1
+    assert SSPMParser().ReadSSPM(path, metadata_only=True).mappers == ["Renamed"]
+
+def test_aio(tmp_path): # async read/write give the same maps, read_many never runs more than `concurrency` at once
+    import asyncio
+    path = str(tmp_path / "async.sspm")
+
+    async def run():
+        parser = await aio.read_sspm("./tests/Test.sspm")
+        await aio.write_sspm(parser, path, map_name="Async", song_name="Song", mappers=["Test"])
+        data = await aio.write_sspm(parser, map_name="Async", song_name="Song", mappers=["Test"])
+
+        running, peak = 0, 0
+        async def work(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return await aio.read_sspm(item, metadata_only=True)
+        results = [result async for result in aio.bounded_map(work, [path] * 6 + [str(tmp_path / "missing.sspm")], concurrency=2)]
+
+        stopped = []
+        async def slow(item):
+            try:
+                await asyncio.sleep(item)
+            except asyncio.CancelledError:
+                stopped.append(item)
+                raise
+            return item
+        early = aio.bounded_map(slow, [0, 10, 10], concurrency=3)
+        async for _ in early: # stopping early cancels the others and waits for them
+            break
+        await early.aclose()
+        assert stopped == [10, 10]
+        return parser, data, peak, results
+
+    parser, data, peak, results = asyncio.run(run())
+    assert parser.Notes == SSPMParser().ReadSSPM("./tests/Test.sspm").Notes
+    assert open(path, "rb").read() == data and SSPMParser().VerifySSPM(path)
+    assert peak == 2 and len(results) == 7
+    assert sum(error is None and result.map_name == "Async" for _, result, error in results) == 6
+    assert [type(error) for _, _, error in results if error is not None] == [FileNotFoundError]
+
+def test_convert_maps(tmp_path): # text/columnar outputs match the parser, finished outputs are skipped on the next run
+    import numpy as np
+    maps = tmp_path / "maps"
+    os.makedirs(maps / "sub")
+    SSPMParser().WriteSSPM(str(maps / "one.sspm"), audio_bytes=None, cover_bytes=None, map_name="One", mappers=["Test"], Notes=SHAREDNOTES)
+    SSPMParser().WriteSSPM(str(maps / "sub" / "two.sspm"), audio_bytes=SHAREDAUDIO, cover_bytes=None, map_name="Two", mappers=["Test"], Notes=SHAREDNOTES[:2])
+    (maps / "broken.sspm").write_bytes(b"not a map")
+
+    seen = []
+    converted, skipped, errors = convert_maps(str(maps), str(tmp_path / "text"), "text", workers=1, progress=lambda *args: seen.append(args))
+    assert sorted(converted) == [str(tmp_path / "text" / "one.txt"), str(tmp_path / "text" / "sub" / "two.txt")]
+    assert skipped == [] and len(errors) == 1 and seen[-1][:3] == (3, 3, 5)
+    assert (tmp_path / "text" / "sub" / "two.txt").read_text() == SSPMParser().ReadSSPM(str(maps / "sub" / "two.sspm")).NOTES2TEXT()
+
+    converted, skipped, errors = convert_maps(str(maps), str(tmp_path / "text"), "text", workers=1)
+    assert converted == [] and len(skipped) == 2 and len(errors) == 1
+
+    convert_maps([str(maps / "one.sspm")], str(tmp_path / "columnar"), "columnar", workers=1)
+    assert np.load(str(tmp_path / "columnar" / "one.npz"))["ms"].tolist() == sorted(ms for _, _, ms in SHAREDNOTES)
+
+    import shutil # same file name in two folders, and a map without note markers
+    os.makedirs(maps / "copy")
+    shutil.copy(maps / "one.sspm", maps / "copy" / "one.sspm")
+    data = bytearray((maps / "one.sspm").read_bytes())
+    data[int.from_bytes(data[96:104], "little")] = 0 # no marker definitions
+    (maps / "copy" / "empty.sspm").write_bytes(bytes(data))
+
+    converted, skipped, errors = convert_maps([str(maps / "one.sspm"), str(maps / "copy" / "one.sspm"), str(maps / "copy" / "empty.sspm")], str(tmp_path / "list"), "text", workers=1)
+    assert sorted(converted) == [str(tmp_path / "list" / "copy" / "empty.txt"), str(tmp_path / "list" / "copy" / "one.txt"), str(tmp_path / "list" / "one.txt")]
+    assert not errors and (tmp_path / "list" / "copy" / "empty.txt").read_text() == ""
+    convert_maps([str(maps / "copy" / "empty.sspm")], str(tmp_path / "empty"), "columnar", workers=1)
+    assert len(np.load(str(tmp_path / "empty" / "empty.npz"))["ms"]) == 0
+
+def test_read_write_stats(): # every phase timed, byte counts add up to the file
+    stats = pysspm_rhythia.SSPMStats()
+    parser = SSPMParser().ReadSSPM("./tests/Test.sspm", stats=stats)
+    phases = stats.phases
+
+    assert list(phases) == ["load", "header", "strings", "custom_data", "audio", "cover", "marker_definitions", "markers"]
+    assert phases["load"]["bytes"] == sum(phases[phase]["bytes"] for phase in phases if phase != "load") == os.path.getsize("./tests/Test.sspm")
+    assert stats.notes_decoded == len(parser.Notes) and stats.total_seconds > 0
+
+    seen = []
+    stats = pysspm_rhythia.SSPMStats(callback=lambda phase, seconds, nbytes: seen.append((phase, nbytes)))
+    data = parser.WriteSSPM(stats=stats)
+    assert [phase for phase, _ in seen] == ["header", "strings", "custom_data", "markers", "marker_definitions", "hashing", "assembly", "audio", "cover", "assembly"]
+    assert sum(stats.phases[phase]["bytes"] for phase in ("assembly", "audio", "cover")) == len(data) and stats.notes_encoded == len(parser.Notes)
+    assert stats.phases["audio"]["bytes"] == len(parser.audio_bytes) and stats.phases["cover"]["bytes"] == len(parser.cover_bytes)
+
+def test_build_catalog(tmp_path): # metadata of a folder of maps, bad files reported separately
+    SSPMParser().WriteSSPM(str(tmp_path / "one.sspm"), audio_bytes=SHAREDAUDIO, cover_bytes=None, map_name="One", mappers=["Test"], Notes=SHAREDNOTES)
+    os.makedirs(tmp_path / "sub")
+    SSPMParser().WriteSSPM(str(tmp_path / "sub" / "two.sspm"), audio_bytes=None, cover_bytes=SHAREDCOVER, map_name="Two", mappers=["Test"], Notes=SHAREDNOTES[:2])
+    (tmp_path / "broken.sspm").write_bytes(b"not a map")
+
+    records, errors = build_catalog(str(tmp_path), workers=2)
+
+    assert [record["map_name"] for record in records] == ["One", "Two"]
+    assert records[0]["has_audio"] and not records[0]["has_cover"]
+    assert records[1]["note_count"] == 2 and records[1]["last_ms"] == 500
+    assert len(errors) == 1 and errors[0][0].endswith("broken.sspm")
+
+def test_update_catalog_skips_unchanged(tmp_path, monkeypatch): # second scan only reads changed maps
+    maps = tmp_path / "maps"
+    os.makedirs(maps)
+    for name in ("one", "two"):
+        SSPMParser().WriteSSPM(str(maps / f"{name}.sspm"), audio_bytes=None, cover_bytes=None, map_name=name, mappers=["Test"], Notes=SHAREDNOTES)
+    database = str(tmp_path / "catalog.db")
+
+    records, errors = update_catalog(str(maps), database, workers=1, with_stats=True)
+    assert len(records) == 2 and not errors
+    assert records[0]["stats"]["note_density"] > 0
+
+    read = []
+    monkeypatch.setattr(catalog, "_read_map_entry", lambda path, with_stats=False: read.append(path) or (catalog.read_map_metadata(path), None))
+    os.remove(maps / "two.sspm")
+    SSPMParser().WriteSSPM(str(maps / "three.sspm"), audio_bytes=None, cover_bytes=None, map_name="three", mappers=["Test"], Notes=SHAREDNOTES)
+
+    records, errors = update_catalog(str(maps), database, workers=1)
+    assert read == [str(maps / "three.sspm")]
+    assert [record["map_name"] for record in records] == ["one", "three"]
+
+def test_verify_maps(tmp_path): # hash checked without reading audio, corrupted markers caught
+    good = tmp_path / "good.sspm"
+    SSPMParser().WriteSSPM(str(good), audio_bytes=SHAREDAUDIO, cover_bytes=None, map_name="Good", mappers=["Test"], Notes=SHAREDNOTES)
+    data = bytearray(good.read_bytes())
+    data[-1] ^= 0xFF
+    (tmp_path / "corrupt.sspm").write_bytes(bytes(data))
+    (tmp_path / "broken.sspm").write_bytes(b"not a map")
+
+    assert SSPMParser().VerifySSPM("./tests/Test.sspm")
+    results, errors = verify_maps(str(tmp_path), workers=2)
+    assert results == {str(tmp_path / "corrupt.sspm"): False, str(good): True}
+    assert len(errors) == 1 and errors[0][0].endswith("broken.sspm")
+
+def test_dedup_index(tmp_path): # exact copies by hash, shifted/edited copies by minhash
+    notes = [((i * 7) % 3, (i * 5) % 3, 300 + i * (100 + (i % 4) * 50)) for i in range(400)]
+    edited = list(notes)
+    edited[100] = (1, 1, edited[100][2])
+    other = [((i * 2) % 3, (i // 3) % 3, 100 + i * 120) for i in range(400)]
+    maps = {"original": notes, "copy": notes, "shifted": [(x, y, ms + 1234) for x, y, ms in notes], "edited": edited, "other": other}
+    for name, map_notes in maps.items():
+        SSPMParser().WriteSSPM(str(tmp_path / f"{name}.sspm"), audio_bytes=None, cover_bytes=None, map_name=name, mappers=["Test"], Notes=map_notes)
+    paths = {name: str(tmp_path / f"{name}.sspm") for name in maps}
+
+    index = DedupIndex()
+    assert index.add_maps(list(paths.values()), workers=1) == []
+    assert index.duplicate_groups() == [sorted([paths["copy"], paths["original"]])]
+    assert index.near_duplicate_groups(0.7) == [sorted(paths[name] for name in ("copy", "edited", "original", "shifted"))]
+
+    matches = index.query_map(paths["original"])
+    assert matches["exact"] == [paths["copy"]]
+    assert [key for key, _ in matches["near"]] == [paths["shifted"], paths["edited"]]
+
+    for name, map_notes in (("single", [(1, 1, 100)]), ("single_other", [(1, 1, 900)])): # too few notes for a pattern
+        SSPMParser().WriteSSPM(str(tmp_path / f"{name}.sspm"), audio_bytes=None, cover_bytes=None, map_name=name, mappers=["Test"], Notes=map_notes)
+        assert index.add_maps([str(tmp_path / f"{name}.sspm")], workers=1) == []
+        assert index.signatures[str(tmp_path / f"{name}.sspm")] is None
+    index.add("empty", b"no markers", None)
+    assert index.near_duplicate_groups(0.7) == [sorted(paths[name] for name in ("copy", "edited", "original", "shifted"))]
+    assert index.query(b"no markers", None) == {"exact": ["empty"], "near": []}
+    index.remove("empty")
+
+def test_blob_store(tmp_path): # difficulty variants share one stored copy of the audio
+    for name in ("easy", "hard"):
+        SSPMParser().WriteSSPM(str(tmp_path / f"{name}.sspm"), audio_bytes=SHAREDAUDIO, cover_bytes=SHAREDCOVER if name == "hard" else None, map_name=name, mappers=["Test"], Notes=SHAREDNOTES)
+
+    store = BlobStore(str(tmp_path / "blobs"))
+    easy = store.read(str(tmp_path / "easy.sspm"))
+    hard = store.read(str(tmp_path / "hard.sspm"))
+
+    assert easy.audio_digest == hard.audio_digest and easy.audio_bytes is hard.audio_bytes
+    assert easy.cover_digest is None and easy.cover_bytes is None
+    assert len(store) == 2 and store.nbytes == len(SHAREDAUDIO) + len(SHAREDCOVER)
+
+    store.export(hard, str(tmp_path / "exported.sspm"))
+    exported = SSPMParser().ReadSSPM(str(tmp_path / "exported.sspm"))
+    assert exported.audio_bytes == SHAREDAUDIO and exported.cover_bytes == SHAREDCOVER
+    assert exported.Notes == SSPMParser().ReadSSPM(str(tmp_path / "hard.sspm")).Notes
+
+    store.export(easy, str(tmp_path / "first.sspm")) # writing doesnt change the parser, so it can be exported again
+    store.export(easy, str(tmp_path / "second.sspm"))
+    assert (tmp_path / "first.sspm").read_bytes() == (tmp_path / "second.sspm").read_bytes()
+    assert SSPMParser().ReadSSPM(str(tmp_path / "second.sspm")).cover_bytes is None
+
+def test_synthetic_maps(tmp_path): # benchmark generator writes V1 and V2 maps that read back the same
+    spec = importlib.util.spec_from_file_location("synthetic", os.path.join(os.path.dirname(__file__), "..", "benchmarks", "synthetic.py"))
+    synthetic = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(synthetic)
+
+    notes = synthetic.synthetic_notes(2000, quantum_ratio=0.3)
+    for version in (1, 2):
+        path = synthetic.write_map(str(tmp_path / f"v{version}.sspm"), 2000, quantum_ratio=0.3, audio_size=1000, version=version)
+        parser = SSPMParser().ReadSSPM(path, columnar=True)
+        assert parser.Header["Version"] == version
+        assert parser.Notes == notes and len(parser.audio_bytes) == 1000
+
+def test_EXTRAS_compute_vectors(): # columns match the per note vectors, Note objects made on demand
+    from pysspm_rhythia.extras import Note, NoteClassifier
+
+    classifier = NoteClassifier([(1, 1, 500), (0, 1, 250), (0.5, 2, 600), (2, 0, 1500)])
+    assert classifier.ms.tolist() == [250, 500, 600, 1500]
+    assert classifier.dx.tolist() == [0, 1, 0.5, 1.5]
+    assert classifier.dt.tolist() == [0, 250, 100, 900]
+    assert classifier.dh.tolist() == [0, 1.0, 1.12, 2.5]
+
+    note = classifier.NoteData[2]
+    assert note.note == (0.5, 2, 600) and note.dh == 1.12 and note is classifier.NoteData[2]
+    assert Note(note=(0, 0, 0)).classifications is not Note(note=(0, 0, 0)).classifications
+
+    kept = Note(note=(2, 2, 700), classifications=["stack"])
+    classifier.NoteData = [(0, 0, 100), kept] # replacing the notes rebuilds the columns
+    assert classifier.dh.tolist() == [0, 2.83] and classifier.NoteData[1] is kept
+
+    floats = NoteClassifier([(0, 0, 100.9), (0, 0, 105.2)]) # quantum/text ms arent truncated, so the gap stays under 5
+    assert abs(floats.dt[1] - 4.3) < 1e-9 and floats.detect_sequences()[1].classifications == ["meganote"]
+
+def test_EXTRAS_detect_sequences(): # bitmask engine gives the same lists the old loop did
+    from pysspm_rhythia.extras import NoteClassifier
+
+    notes = [(1, 1, 0), (1, 2, 100), (2, 2, 200), (2, 2, 202), (0, 0, 300), (0, 1, 400), (0, 1, 500), (1.5, 1, 600), (2, 0, 700)]
+    classifier = NoteClassifier(notes)
+    classified = classifier.classify_patterns()
+
+    assert [note.classifications for note in classified] == [
+        ["meganote"], ["spiral"], ["spiral"], ["spiral", "meganote"], ["spiral", "jumpstream", "short-slide"],
+        ["spiral", "short-slide"], ["spiral", "stack", "short-slide"], ["spiral", "jumpstream", "quantum"], ["spiral"],
+    ]
+    bits = NoteClassifier.CLASSIFICATION_BITS
+    assert classifier.classification_mask[6] == bits["spiral"] | bits["stack"] | bits["short-slide"]
+    assert classifier.classification_counts()["spiral"] == 8
+
+def test_EXTRAS_classify_stream(tmp_path): # chunks straight from the file give the same result as classifying everything
+    from pysspm_rhythia.extras import NoteClassifier
+    from pysspm_rhythia.pysspm import SSPMParser # the package parser, not the copy loaded at the top, so the NoteArray here is the one users pass to extras
+
+    path = str(tmp_path / "stream.sspm")
+    notes = [((i * 7) % 3, (i // 2) % 3 + (0.5 if i % 11 == 0 else 0), 100 + (i // 2) * 60 + (i % 2) * (i % 3)) for i in range(500)]
+    SSPMParser().WriteSSPM(path, audio_bytes=SHAREDAUDIO, cover_bytes=None, map_name="Stream", mappers=["Test"], Notes=notes)
+
+    chunks = list(SSPMParser().IterNotes(path, chunk_size=64))
+    assert max(len(chunk) for chunk in chunks) == 64 and sum(len(chunk) for chunk in chunks) == 500
+
+    streamed = list(NoteClassifier.classify_stream(iter(chunks)))
+    batch = NoteClassifier(SSPMParser().ReadSSPM(path, columnar=True).Notes)
+    batch.classify_patterns()
+
+    assert [note.classifications for part in streamed for note in part.NoteData] == [note.classifications for note in batch.NoteData]
+    with pytest.raises(ValueError):
+        list(NoteClassifier.classify_stream([[(0, 0, 100), (1, 1, 50)]]))
+
+def test_EXTRAS_star_rating(tmp_path): # faster/wider maps rate higher, batch matches single
+    from pysspm_rhythia.extras import calcStarRating, calcStarRatings
+    from pysspm_rhythia.pysspm import SSPMParser
+
+    def stream(gap, distance=1):
+        return [((i % 2) * distance, 1, i * gap) for i in range(400)]
+
+    slow, timeline = calcStarRating(stream(300))
+    assert len(timeline) == 400 and timeline["strain"][0] == 0 and timeline["ms"][-1] == 399 * 300
+    assert 0 < slow < calcStarRating(stream(150))[0] < calcStarRating(stream(150, distance=2))[0]
+    assert calcStarRating([(0, 0, 100)])[0] == 0
+
+    no_notes = SSPMParser()
+    no_notes.Notes = None # maps without note markers rate 0 instead of raising
+    assert calcStarRating(no_notes)[0] == 0 and len(calcStarRating(no_notes)[1]) == 0
+
+    path = str(tmp_path / "rated.sspm")
+    SSPMParser().WriteSSPM(path, audio_bytes=SHAREDAUDIO, cover_bytes=None, map_name="Rated", mappers=["Test"], Notes=stream(150))
+    ratings, errors = calcStarRatings([path], workers=1)
+    assert ratings[path] == pytest.approx(calcStarRating(stream(150))[0]) and not errors
+
+def test_EXTRAS_obsiid_rating(): # batch gives the same ratings as one map at a time
+    from pysspm_rhythia.extras import calcObsiidRating, calcObsiidRatings
+    from pysspm_rhythia.pysspm import SSPMParser
+
+    parser = SSPMParser().ReadSSPM("./tests/Test.sspm", columnar=True)
+    stream = [((i % 2), 1, i * 150) for i in range(400)]
+    assert calcObsiidRating(stream) == pytest.approx(20 / 3) # (1 + 1 grid unit) / 0.15s, scaled
+    assert calcObsiidRating(parser, notes=stream) == pytest.approx(20 / 3)
+
+    maps = [stream, [], parser, parser.Notes[:1], "./tests/Test.sspm"]
+    ratings = calcObsiidRatings(maps)
+    assert ratings.tolist() == pytest.approx([calcObsiidRating(notes) for notes in maps[:-1]] + [ratings[2]])
+    assert ratings[1] == ratings[3] == 0
+
 def test_EXTRAS_PP_Calc_V1():
     print("W.I.P")
     assert 1==1